@@ -1,46 +1,351 @@
+from data_structures.node_pool import check_pool
+from data_structures.snapshot import read_records, write_records
+
+
 class Node:
     """
     Classe che rappresenta un nodo dell'ABR
-    Ogni nodo contiene una coppia chiave-valore e puntatori ai nodi sinistro e destro
+    Ogni nodo contiene una coppia chiave-valore, puntatori ai nodi sinistro e destro
+    e la dimensione del proprio sotto-albero (usata da rank e select)
     """
+    __slots__ = ('key', 'value', 'left', 'right', 'size')      # niente __dict__ per ogni nodo: layout compatto
+
     def __init__(self, key, value):
         self.key = key
         self.value = value
         self.left = None                                 # puntatore al nodo sinistro
         self.right = None                                # puntatore al nodo destro
+        self.size = 1                                    # numero di nodi nel sotto-albero radicato nel nodo
 
     def __str__(self):
         return f"Node(key={self.key}, value={self.value})"
 
+    def copy(self):
+        node = self.__class__(self.key, self.value)
+        node.left = self.left
+        node.right = self.right
+        node.size = self.size
+        return node
+
+
+class PersistentNode(Node):
+    """
+    Nodo dei dizionari persistenti: epoch è l'epoca in cui il nodo è stato creato, i nodi di un'epoca precedente
+    possono essere condivisi con uno snapshot e non vanno più modificati
+    """
+    __slots__ = ('epoch',)
+
 
 class ABRDict:
     """
     Classe che rappresenta un dizionario basato su ABR
+    Se viene passato un NodePool, i nodi cancellati vengono riciclati dagli inserimenti successivi
+    Con persistent=True gli aggiornamenti copiano il percorso dalla radice al nodo modificato invece di modificare
+    i nodi condivisi, e snapshot() restituisce in O(1) una versione in sola lettura che condivide tutti gli altri nodi
     """
-    def __init__(self):
+    node_class = Node                                   # classe dei nodi creati dal dizionario
+    persistent_node_class = PersistentNode              # classe dei nodi in modalità persistente
+
+    def __init__(self, pool=None, persistent=False):
+        if persistent and pool is not None:             # un nodo cancellato può essere ancora in uno snapshot
+            raise ValueError("Un dizionario persistente non può riciclare i nodi con un NodePool.")
+        check_pool(pool, self.node_class)
         self.root = None                                # inizialmente la radice dell'ABR è nulla
+        self.pool = pool
+        self._version = 0                               # cambia a ogni modifica strutturale (per gli iteratori)
+        self.persistent = persistent
+        self.frozen = False                             # True per gli snapshot, che sono in sola lettura
+        if persistent:
+            self.node_class = self.persistent_node_class
+            self._epoch = 0                             # i nodi di quest'epoca appartengono solo a questa versione
+            self.snapshots = 0                          # snapshot creati (statistica)
+            self.copies = 0                             # nodi copiati lungo i percorsi (statistica)
+
+    def _new_node(self, key, value):
+        self._version += 1
+        if self.persistent:
+            self._check_writable()
+            node = self.node_class(key, value)
+            node.epoch = self._epoch
+            return node
+        if self.pool is not None:
+            return self.pool.acquire(key, value)
+        return self.node_class(key, value)
+
+    def _release_node(self, node):
+        self._version += 1
+        if self.pool is not None:
+            self.pool.release(node)
+
+    def _check_writable(self):
+        if self.frozen:
+            raise TypeError("Lo snapshot è in sola lettura.")
+
+    def _writable(self, node):
+        """
+        Restituisce una versione modificabile di node: il nodo stesso se il dizionario non è persistente o se il nodo è
+        stato creato dopo l'ultimo snapshot, altrimenti una sua copia (che il chiamante deve collegare al genitore)
+        """
+        if not self.persistent or node.epoch == self._epoch:
+            return node
+        self._check_writable()
+        copy = node.copy()
+        copy.epoch = self._epoch
+        self.copies += 1
+        return copy
+
+    def snapshot(self):
+        """
+        Restituisce in O(1) una versione in sola lettura del dizionario, che condivide tutti i nodi con l'originale
+        Da qui in poi gli aggiornamenti dell'originale copiano i nodi che toccano, quindi lo snapshot si può
+        scandire mentre l'originale viene modificato (anche da un altro thread, se la chiamata a snapshot è protetta
+        dallo stesso lock degli aggiornamenti)
+        """
+        if not self.persistent:
+            raise ValueError("Gli snapshot richiedono un dizionario persistente (persistent=True).")
+        if self.frozen:
+            return self
+
+        view = self.__class__(persistent=True)
+        view.root = self.root
+        view.frozen = True
+        view._epoch = None                              # nessun nodo è suo: ogni modifica passa da _check_writable
+        self._epoch += 1                                # tutti i nodi esistenti ora sono condivisi
+        self.snapshots += 1
+        return view
+
+    def memory_sharing(self, *versions):
+        """
+        Statistiche di condivisione dei nodi tra il dizionario e le versioni date (tipicamente i suoi snapshot):
+        nodi logici (la somma delle dimensioni) contro nodi distinti effettivamente in memoria
+        Un sotto-albero già visitato è condiviso per intero, quindi non lo riattraverso: il costo è O(nodi distinti)
+        """
+        seen = set()
+        logical = 0
+        for version in (self,) + versions:
+            logical += len(version)
+            stack = [version.root] if version.root is not None else []
+            while stack:
+                node = stack.pop()
+                if id(node) in seen:
+                    continue
+                seen.add(id(node))
+                stack.extend(child for child in (node.left, node.right) if child is not None)
+
+        distinct = len(seen)
+        return {
+            'versions': len(versions) + 1,
+            'logical_nodes': logical,
+            'distinct_nodes': distinct,
+            'shared_fraction': 1 - distinct / logical if logical else 0.0
+        }
+
+    @staticmethod
+    def _size(node):
+        return node.size if node is not None else 0
+
+    def _update(self, node):
+        """
+        Aggiorna le informazioni aggiuntive del nodo a partire dai figli (dimensione del sotto-albero)
+        Le sotto-classi che memorizzano altro nei nodi (es. l'altezza nell'AVL) lo estendono
+        """
+        node.size = 1 + self._size(node.left) + self._size(node.right)
+
+    @classmethod
+    def from_items(cls, items, **kwargs):
+        """
+        Costruisce un nuovo dizionario a partire da una sequenza di coppie chiave-valore in O(n log n),
+        con un albero perfettamente bilanciato indipendentemente dall'ordine delle chiavi
+        """
+        dict_instance = cls(**kwargs)
+        dict_instance.bulk_insert(items)
+        return dict_instance
+
+    def bulk_insert(self, items):
+        """
+        Inserisce una sequenza di coppie chiave-valore: ordino il blocco una volta sola, lo fondo con gli elementi
+        già presenti (visita in ordine) e ricostruisco l'albero perfettamente bilanciato dal basso
+        Se una chiave compare più volte vince l'ultima coppia, come con insert ripetute
+        """
+        self._check_writable()
+        batch = []
+        for key, value in sorted(items, key=lambda item: item[0]):      # sort stabile: i duplicati restano in ordine
+            if batch and batch[-1][0] == key:
+                batch[-1] = (key, value)
+            else:
+                batch.append((key, value))
+        if not batch:
+            return
+
+        existing = [(node.key, node.value) for node in self._iter_nodes()]
+        merged = []
+        i = j = 0
+        while i < len(existing) and j < len(batch):                     # fusione di due sequenze ordinate
+            if existing[i][0] < batch[j][0]:
+                merged.append(existing[i])
+                i += 1
+            else:
+                if existing[i][0] == batch[j][0]:                       # chiave già presente: vince il nuovo valore
+                    i += 1
+                merged.append(batch[j])
+                j += 1
+        merged.extend(existing[i:])
+        merged.extend(batch[j:])
+
+        self.root = self._build_balanced(iter(merged), len(merged))
+
+    def save(self, path):
+        """
+        Salva il dizionario su file (formato di data_structures.snapshot) con le coppie in ordine di chiave
+        """
+        write_records(path, self.items(), len(self))
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """
+        Ricostruisce un dizionario salvato con save: le coppie sono già in ordine, quindi l'albero perfettamente
+        bilanciato si costruisce in O(n) leggendo il file in streaming, senza caricarlo prima in una lista
+        """
+        count, records = read_records(path)
+        dict_instance = cls(**kwargs)
+        dict_instance.root = dict_instance._build_balanced(cls._check_sorted(records), count)
+        return dict_instance
+
+    @staticmethod
+    def _check_sorted(records):
+        first = True
+        previous = None
+        for key, value in records:
+            if not first and not previous < key:        # l'albero si costruisce solo da chiavi ordinate
+                raise ValueError("Lo snapshot non contiene chiavi in ordine strettamente crescente.")
+            first = False
+            previous = key
+            yield key, value
+
+    def _build_balanced(self, items, n):
+        """
+        Costruisce un albero perfettamente bilanciato con i prossimi n elementi dell'iteratore ordinato items
+        I nodi vengono creati in ordine (prima il sotto-albero sinistro, poi la radice, poi il destro),
+        quindi l'iteratore viene consumato una sola volta e la ricorsione è profonda solo O(log n)
+        """
+        if n == 0:
+            return None
+
+        left = self._build_balanced(items, n // 2)
+        key, value = next(items)
+        node = self._new_node(key, value)
+        node.left = left
+        node.right = self._build_balanced(items, n - n // 2 - 1)
+        self._update(node)
+        return node
+
+    def _iter_nodes(self):
+        """
+        Visita in ordine non ricorsiva: uso uno stack esplicito, quindi la memoria extra è O(altezza)
+        """
+        stack = []
+        current = self.root
+        while stack or current is not None:
+            while current is not None:                  # scendo a sinistra accumulando gli antenati
+                stack.append(current)
+                current = current.left
+            current = stack.pop()
+            yield current
+            current = current.right
+
+    def __len__(self):
+        return self._size(self.root)                    # la radice conosce la dimensione dell'intero albero
+
+    def __iter__(self):
+        return self.keys()
+
+    def keys(self):
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        for _, value in self.items():
+            yield value
+
+    def items(self):
+        """
+        Generatore delle coppie (chiave, valore) in ordine crescente di chiave, con memoria extra O(altezza)
+        Se il dizionario viene modificato durante l'iterazione lancia RuntimeError, come i dict di Python
+        """
+        version = self._version
+        for node in self._iter_nodes():
+            if self._version != version:
+                raise RuntimeError("Il dizionario è stato modificato durante l'iterazione.")
+            yield node.key, node.value
+        if self._version != version:
+            raise RuntimeError("Il dizionario è stato modificato durante l'iterazione.")
 
     def insert(self, key, value):
+        if self.persistent:
+            self._persistent_insert(key, value)
+            return
+
         if self.root is None:
-            self.root = Node(key, value)                # se l'albero è vuoto, creo la radice
+            self.root = self._new_node(key, value)      # se l'albero è vuoto, creo la radice
             return
 
+        path = []                                       # antenati del nuovo nodo, per aggiornare le dimensioni
         current = self.root
         while True:
+            path.append(current)
             if key < current.key:                       # se la chiave è minore, cerco nel sotto-albero sinistro
                 if current.left is None:
-                    current.left = Node(key, value)
-                    return
+                    current.left = self._new_node(key, value)
+                    break
                 current = current.left
             elif key > current.key:                     # se la chiave è maggiore, cerco nel sotto-albero destro
                 if current.right is None:
-                    current.right = Node(key, value)
-                    return
+                    current.right = self._new_node(key, value)
+                    break
                 current = current.right
             else:                                       # se la chiave esiste già, aggiorna il valore e termina
                 current.value = value
                 return
 
+        for node in path:                               # ogni antenato ha un discendente in più
+            node.size += 1
+
+    def _persistent_insert(self, key, value):
+        """
+        Inserimento con copia del percorso: scendo senza modificare nulla, poi risalgo sostituendo ogni antenato
+        con la sua versione modificabile (_writable) collegata al nuovo figlio
+        """
+        self._check_writable()
+        path = []
+        current = self.root
+        while current is not None and current.key != key:
+            path.append(current)
+            current = current.left if key < current.key else current.right
+
+        if current is None:
+            child = self._new_node(key, value)
+            grown = 1                                   # ogni antenato ha un discendente in più
+        else:
+            child = self._writable(current)             # la chiave esiste già: nuova versione del nodo
+            child.value = value
+            grown = 0
+        self.root = self._relink(path, key, child, grown)
+
+    def _relink(self, path, key, child, delta):
+        """
+        Risale il percorso (dalla radice verso key) dal basso: ogni antenato diventa modificabile, punta al figlio
+        nella direzione di key e la sua dimensione cambia di delta; restituisce la nuova radice
+        """
+        for node in reversed(path):
+            node = self._writable(node)
+            if key < node.key:
+                node.left = child
+            else:
+                node.right = child
+            node.size += delta
+            child = node
+        return child
+
     def search(self, key):
         current = self.root
         while current is not None:
@@ -54,20 +359,89 @@ class ABRDict:
         # Se non trovo la chiave, lancio un'eccezione
         raise KeyError(f"La chiave '{key}' non è presente nel dizionario.")
 
+    def _find_node(self, key):
+        """
+        Restituisce il nodo con la chiave data, None se non è presente (senza lanciare eccezioni)
+        """
+        current = self.root
+        while current is not None:
+            if key < current.key:
+                current = current.left
+            elif key > current.key:
+                current = current.right
+            else:
+                return current
+        return None
+
+    def _trace(self, key):
+        """
+        Percorso che una ricerca di key compie nell'albero, per le statistiche (vedi data_structures.stats):
+        nodi visitati, confronti tra chiavi e profondità raggiunta
+        """
+        visited = comparisons = 0
+        current = self.root
+        while current is not None:
+            visited += 1
+            if key < current.key:
+                comparisons += 1
+                current = current.left
+            else:
+                comparisons += 2
+                if key > current.key:
+                    current = current.right
+                else:
+                    break
+        return {'nodes_visited': visited, 'comparisons': comparisons, 'depth': visited}
+
+    def search_many(self, keys, default=None):
+        """
+        Cerca una sequenza di chiavi senza lanciare eccezioni per quelle mancanti
+        Restituisce la lista dei valori (default per le chiavi assenti) e la maschera dei successi
+        """
+        values = []
+        hits = []
+        for key in keys:
+            node = self._find_node(key)
+            hits.append(node is not None)
+            values.append(node.value if node is not None else default)
+        return values, hits
+
+    def contains_many(self, keys):
+        return [self._find_node(key) is not None for key in keys]
+
+    def delete_many(self, keys):
+        """
+        Cancella una sequenza di chiavi, quelle mancanti vengono ignorate
+        Restituisce la maschera delle chiavi effettivamente cancellate
+        """
+        return [self._remove(key) for key in keys]
+
     def delete(self, key):
+        # Se non trovo la chiave, lancio un'eccezione
+        if not self._remove(key):
+            raise KeyError(f"Impossibile cancellare: la chiave '{key}' non è presente.")
+
+    def _remove(self, key):
+        """
+        Cancella il nodo con la chiave data, restituisce False se la chiave non è presente
+        """
+        if self.persistent:
+            return self._persistent_remove(key)
+
         parent = None                                   # genitore del nodo da cancellare
+        path = []                                       # antenati del nodo rimosso, per aggiornare le dimensioni
 
         current = self.root
         while current is not None and current.key != key:   # devo trovare il nodo da cancellare e il suo genitore
             parent = current                            # tengo traccia del genitore
+            path.append(current)
             if key < current.key:                       # se la chiave è minore, vado a sinistra
                 current = current.left
             else:                                       # se la chiave è maggiore, vado a destra
                 current = current.right
 
-        # Se non trovo la chiave, lancio un'eccezione
         if current is None:
-            raise KeyError(f"Impossibile cancellare: la chiave '{key}' non è presente.")
+            return False
 
         if current.left is None and current.right is None:          # il nodo da cancellare è una foglia
             if current == self.root:                                # se il nodo da cancellare è la radice
@@ -96,8 +470,10 @@ class ABRDict:
         else:                                                       # il nodo ha due figli
             successor_parent = current                              # il genitore del successore
             successor = current.right                               # trovo il successore (min nel sotto-albero destro)
+            path.append(current)
             while successor.left is not None:                       # scendo a sinistra finché posso
                 successor_parent = successor                        # tengo traccia del genitore
+                path.append(successor)
                 successor = successor.left                          # vado a sinistra
 
             current.key = successor.key                             # copio chiave e valore del successore
@@ -107,16 +483,182 @@ class ABRDict:
                 successor_parent.left = successor.right         # collego il genitore del succ a figlio dx del succ
             else:                                               # se il succ è il figlio dx del nodo da cancellare
                 successor_parent.right = successor.right        # collego il genitore del succ al figlio dx del succ
+            current = successor                                     # il nodo rimosso fisicamente è il successore
 
-    def __str__(self):
-        elements = []
-        self._build_str_in_order(self.root, elements)           # inorder-tree-walk per ottenere gli elementi in ordine
-        return "{ " + ", ".join(elements) + " }"
+        for node in path:                                           # ogni antenato ha un discendente in meno
+            node.size -= 1
 
-    def _build_str_in_order(self, node, elements):
-        if node is None:
-            return
+        self._release_node(current)
+        return True
+
+    def _persistent_remove(self, key):
+        """
+        Cancellazione con copia del percorso: i nodi condivisi non vengono modificati (in particolare non copio
+        il successore dentro il nodo da cancellare, ma in una sua nuova versione)
+        """
+        self._check_writable()                          # una foglia o la radice non passano da _writable
+        path = []
+        current = self.root
+        while current is not None and current.key != key:
+            path.append(current)
+            current = current.left if key < current.key else current.right
+
+        if current is None:
+            return False
+
+        if current.left is None or current.right is None:           # al più un figlio: prende il posto del nodo
+            child = current.left if current.right is None else current.right
+            removed = current
+        else:                                                       # due figli: lo sostituisco con il successore
+            successor_path = []
+            removed = current.right
+            while removed.left is not None:
+                successor_path.append(removed)
+                removed = removed.left
+            child = removed.right
+            for node in reversed(successor_path):                   # risalgo fino al figlio destro di current
+                node = self._writable(node)
+                node.left = child
+                node.size -= 1
+                child = node
+            replacement = self._writable(current)
+            replacement.key = removed.key
+            replacement.value = removed.value
+            replacement.right = child
+            replacement.size -= 1
+            child = replacement
+
+        self.root = self._relink(path, key, child, -1)
+        self._release_node(removed)
+        return True
+
+    def range(self, lo=None, hi=None):
+        """
+        Generatore delle coppie (chiave, valore) con lo <= chiave < hi, in ordine crescente
+        Gli estremi None non pongono limiti; i sotto-alberi fuori dall'intervallo non vengono visitati,
+        quindi il costo è O(altezza + k) per k risultati
+        """
+        version = self._version
+        stack = []
+        current = self.root
+        while True:
+            if self._version != version:                # stesso controllo degli iteratori
+                raise RuntimeError("Il dizionario è stato modificato durante l'iterazione.")
+            while current is not None:                  # scendo a sinistra solo se può esserci qualcosa >= lo
+                if lo is not None and current.key < lo:
+                    current = current.right             # nodo e sotto-albero sinistro sono sotto lo: li salto
+                else:
+                    stack.append(current)
+                    current = current.left
+            if not stack:
+                return
+            current = stack.pop()
+            if hi is not None and not current.key < hi:     # tutti i nodi rimanenti sono >= hi
+                return
+            yield current.key, current.value
+            current = current.right
+
+    def floor(self, key):
+        """
+        Restituisce la coppia (chiave, valore) con la chiave più grande <= key
+        """
+        best = None
+        current = self.root
+        while current is not None:
+            if key < current.key:
+                current = current.left
+            else:
+                best = current                          # candidato: cerco uno più grande a destra
+                if not current.key < key:
+                    break
+                current = current.right
+        if best is None:
+            raise KeyError(f"Nessuna chiave minore o uguale a '{key}' nel dizionario.")
+        return best.key, best.value
+
+    def ceiling(self, key):
+        """
+        Restituisce la coppia (chiave, valore) con la chiave più piccola >= key
+        """
+        best = None
+        current = self.root
+        while current is not None:
+            if current.key < key:
+                current = current.right
+            else:
+                best = current                          # candidato: cerco uno più piccolo a sinistra
+                if not key < current.key:
+                    break
+                current = current.left
+        if best is None:
+            raise KeyError(f"Nessuna chiave maggiore o uguale a '{key}' nel dizionario.")
+        return best.key, best.value
 
-        self._build_str_in_order(node.left, elements)
-        elements.append(f"[{node.key}: {node.value}]")
-        self._build_str_in_order(node.right, elements)
+    def min(self):
+        if self.root is None:
+            raise KeyError("Il dizionario è vuoto.")
+        current = self.root
+        while current.left is not None:                 # il minimo è il nodo più a sinistra
+            current = current.left
+        return current.key, current.value
+
+    def max(self):
+        if self.root is None:
+            raise KeyError("Il dizionario è vuoto.")
+        current = self.root
+        while current.right is not None:                # il massimo è il nodo più a destra
+            current = current.right
+        return current.key, current.value
+
+    def rank(self, key):
+        """
+        Restituisce il numero di chiavi strettamente minori di key, in O(altezza) grazie alle dimensioni dei sotto-alberi
+        """
+        rank = 0
+        current = self.root
+        while current is not None:
+            if key < current.key:
+                current = current.left
+            elif current.key < key:
+                rank += self._size(current.left) + 1    # il nodo e tutto il suo sotto-albero sinistro sono minori
+                current = current.right
+            else:
+                return rank + self._size(current.left)
+        return rank
+
+    def select(self, i):
+        """
+        Restituisce la coppia (chiave, valore) di posizione i nell'ordine delle chiavi (0 = minimo, -1 = massimo)
+        """
+        n = self._size(self.root)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(f"Posizione {i} fuori dall'intervallo [0, {n}).")
+
+        current = self.root
+        while True:
+            left_size = self._size(current.left)
+            if i < left_size:
+                current = current.left
+            elif i > left_size:
+                i -= left_size + 1                      # salto il sotto-albero sinistro e il nodo
+                current = current.right
+            else:
+                return current.key, current.value
+
+    def height(self):
+        """
+        Restituisce l'altezza dell'albero (numero di livelli)
+        La visita è per livelli e non ricorsiva, così funziona anche sugli alberi degeneri prodotti da chiavi ordinate
+        """
+        height = 0
+        level = [self.root] if self.root is not None else []
+        while level:
+            height += 1
+            level = [child for node in level for child in (node.left, node.right) if child is not None]
+        return height
+
+    def __str__(self):
+        elements = [f"[{key}: {value}]" for key, value in self.items()]     # visita in ordine, non ricorsiva
+        return "{ " + ", ".join(elements) + " }"
@@ -0,0 +1,165 @@
+from data_structures.abr_dict import ABRDict
+
+
+class Node:
+    """
+    Classe che rappresenta un nodo dell'albero AVL
+    Oltre alla coppia chiave-valore, ai puntatori ai figli e alla dimensione del sotto-albero,
+    ogni nodo memorizza l'altezza del proprio sotto-albero
+    """
+    __slots__ = ('key', 'value', 'left', 'right', 'size', 'height')
+
+    def __init__(self, key, value):
+        self.key = key
+        self.value = value
+        self.left = None                                 # puntatore al nodo sinistro
+        self.right = None                                # puntatore al nodo destro
+        self.size = 1                                    # numero di nodi nel sotto-albero radicato nel nodo
+        self.height = 1                                  # altezza del sotto-albero radicato nel nodo
+
+    def __str__(self):
+        return f"Node(key={self.key}, value={self.value}, height={self.height})"
+
+    def copy(self):
+        node = self.__class__(self.key, self.value)
+        node.left = self.left
+        node.right = self.right
+        node.size = self.size
+        node.height = self.height
+        return node
+
+
+class PersistentNode(Node):
+    """
+    Nodo AVL dei dizionari persistenti (vedi abr_dict.PersistentNode)
+    """
+    __slots__ = ('epoch',)
+
+
+class AVLDict(ABRDict):
+    """
+    Classe che rappresenta un dizionario basato su ABR auto-bilanciato (albero AVL)
+    Dopo ogni inserimento o cancellazione i fattori di bilanciamento vengono ripristinati con delle rotazioni,
+    quindi l'altezza resta O(log n) anche quando le chiavi arrivano in ordine crescente
+    In modalità persistente ogni nodo modificato (anche dalle rotazioni) passa da _writable, quindi gli snapshot
+    non vedono mai i ribilanciamenti successivi
+    """
+    node_class = Node
+    persistent_node_class = PersistentNode
+
+    def __init__(self, pool=None, persistent=False):
+        super().__init__(pool, persistent)
+        self.rotations = 0                              # numero di rotazioni eseguite (statistica)
+
+    def insert(self, key, value):
+        self._check_writable()
+        self.root = self._insert(self.root, key, value)
+
+    def _insert(self, node, key, value):
+        if node is None:
+            return self._new_node(key, value)           # posizione trovata: creo il nuovo nodo
+
+        node = self._writable(node)                     # il nodo cambia in ogni caso (figlio o valore)
+        if key < node.key:                              # se la chiave è minore, inserisco nel sotto-albero sinistro
+            node.left = self._insert(node.left, key, value)
+        elif key > node.key:                            # se la chiave è maggiore, inserisco nel sotto-albero destro
+            node.right = self._insert(node.right, key, value)
+        else:                                           # se la chiave esiste già, aggiorno il valore
+            node.value = value
+            return node                                 # la struttura non cambia, non serve ribilanciare
+
+        return self._rebalance(node)
+
+    def _remove(self, key):
+        self._check_writable()                          # cancellare una foglia non passa da _writable
+        if self._find_node(key) is None:                # controllo prima la presenza: la discesa costa O(log n)
+            return False
+        self.root = self._delete(self.root, key)
+        return True
+
+    def _delete(self, node, key):
+        # Se non trovo la chiave, lancio un'eccezione (nessun nodo è ancora stato modificato)
+        if node is None:
+            raise KeyError(f"Impossibile cancellare: la chiave '{key}' non è presente.")
+
+        if key < node.key:
+            node = self._writable(node)
+            node.left = self._delete(node.left, key)
+        elif key > node.key:
+            node = self._writable(node)
+            node.right = self._delete(node.right, key)
+        else:
+            if node.left is None or node.right is None:     # al più un figlio: lo sostituisco al nodo cancellato
+                child = node.left if node.right is None else node.right
+                self._release_node(node)
+                return child
+
+            node = self._writable(node)
+            successor = node.right                      # due figli: trovo il successore (min del sotto-albero dx)
+            while successor.left is not None:
+                successor = successor.left
+            node.key = successor.key                    # copio chiave e valore del successore
+            node.value = successor.value
+            node.right = self._delete_min(node.right)   # e lo rimuovo dal sotto-albero destro
+
+        return self._rebalance(node)
+
+    def _delete_min(self, node):
+        if node.left is None:                           # il minimo non ha figlio sinistro
+            child = node.right
+            self._release_node(node)
+            return child
+        node = self._writable(node)
+        node.left = self._delete_min(node.left)
+        return self._rebalance(node)
+
+    def height(self):
+        return self.root.height if self.root is not None else 0     # l'altezza è memorizzata nella radice
+
+    @staticmethod
+    def _height(node):
+        return node.height if node is not None else 0
+
+    def _update(self, node):
+        super()._update(node)
+        node.height = 1 + max(self._height(node.left), self._height(node.right))
+
+    def _rebalance(self, node):
+        """
+        Aggiorna l'altezza del nodo e, se il fattore di bilanciamento esce da [-1, 1], esegue le rotazioni
+        Restituisce la nuova radice del sotto-albero
+        """
+        self._update(node)
+        balance = self._height(node.left) - self._height(node.right)
+
+        if balance > 1:                                 # sbilanciato a sinistra
+            if self._height(node.left.left) < self._height(node.left.right):
+                node.left = self._rotate_left(node.left)        # caso sinistra-destra
+            return self._rotate_right(node)
+
+        if balance < -1:                                # sbilanciato a destra
+            if self._height(node.right.right) < self._height(node.right.left):
+                node.right = self._rotate_right(node.right)     # caso destra-sinistra
+            return self._rotate_left(node)
+
+        return node
+
+    def _rotate_left(self, node):
+        node = self._writable(node)                     # il figlio da ruotare può essere ancora condiviso
+        pivot = self._writable(node.right)              # il figlio destro diventa la radice del sotto-albero
+        node.right = pivot.left
+        pivot.left = node
+        self._update(node)                              # prima il nodo sceso, poi la nuova radice
+        self._update(pivot)
+        self.rotations += 1
+        return pivot
+
+    def _rotate_right(self, node):
+        node = self._writable(node)
+        pivot = self._writable(node.left)               # tutto specchiato rispetto alla rotazione sinistra
+        node.left = pivot.right
+        pivot.right = node
+        self._update(node)
+        self._update(pivot)
+        self.rotations += 1
+        return pivot
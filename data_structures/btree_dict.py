@@ -0,0 +1,505 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+from data_structures.snapshot import read_records, write_records
+
+
+class Leaf:
+    """
+    Classe che rappresenta una foglia del B+-albero: chiavi ordinate e valori in due liste parallele,
+    più il puntatore alla foglia successiva per le visite in ordine
+    """
+    __slots__ = ('keys', 'values', 'next')
+
+    def __init__(self, keys, values):
+        self.keys = keys
+        self.values = values
+        self.next = None
+
+
+class Internal:
+    """
+    Classe che rappresenta un nodo interno del B+-albero
+    keys[i] separa children[i] (chiavi < keys[i]) da children[i + 1] (chiavi >= keys[i]);
+    sizes[i] è il numero di chiavi nel sotto-albero children[i], usato da rank e select
+    """
+    __slots__ = ('keys', 'children', 'sizes')
+
+    def __init__(self, keys, children, sizes):
+        self.keys = keys
+        self.children = children
+        self.sizes = sizes
+
+
+class BTreeDict:
+    """
+    Classe che rappresenta un dizionario ordinato basato su un B+-albero
+    Ogni nodo contiene fino a order chiavi (o figli) in liste contigue, in cui cerco con bisect: rispetto ad ABRDict
+    l'albero è alto O(log_order n) invece di O(log2 n), quindi una ricerca salta fra pochi oggetti e fa quasi tutti
+    i confronti dentro bisect; le foglie sono collegate, così le visite in ordine e range scorrono le liste di fila
+    Stessa interfaccia e stesso ordinamento di ABRDict (insert, search, delete, range, floor/ceiling, rank/select...)
+    Con int_keys=True le chiavi (solo interi a 64 bit) stanno in array('q') invece che in liste: bisect legge i valori
+    direttamente dal blocco contiguo invece di seguire un puntatore a un oggetto int per ogni confronto
+    """
+    def __init__(self, order=64, int_keys=False):
+        if order < 4:
+            raise ValueError("L'ordine del B+-albero deve essere almeno 4.")
+        self.order = order                              # massimo di chiavi per foglia e di figli per nodo interno
+        self.int_keys = int_keys
+        self.root = Leaf(self._new_keys(), [])
+        self.count = 0
+        self._version = 0                               # cambia a ogni modifica strutturale (per gli iteratori)
+
+    def _new_keys(self, keys=()):
+        return array('q', keys) if self.int_keys else list(keys)
+
+    @classmethod
+    def from_items(cls, items, **kwargs):
+        """
+        Costruisce un nuovo dizionario a partire da una sequenza di coppie chiave-valore in O(n log n)
+        """
+        dict_instance = cls(**kwargs)
+        dict_instance.bulk_insert(items)
+        return dict_instance
+
+    def bulk_insert(self, items):
+        """
+        Inserisce una sequenza di coppie chiave-valore: ordino il blocco, lo fondo con gli elementi già presenti e
+        ricostruisco l'albero dal basso con foglie piene in modo uniforme
+        Se una chiave compare più volte vince l'ultima coppia, come con insert ripetute
+        """
+        batch = []
+        for key, value in sorted(items, key=lambda item: item[0]):      # sort stabile: i duplicati restano in ordine
+            if batch and batch[-1][0] == key:
+                batch[-1] = (key, value)
+            else:
+                batch.append((key, value))
+        if not batch:
+            return
+
+        existing = list(self.items())
+        merged = []
+        i = j = 0
+        while i < len(existing) and j < len(batch):                     # fusione di due sequenze ordinate
+            if existing[i][0] < batch[j][0]:
+                merged.append(existing[i])
+                i += 1
+            else:
+                if existing[i][0] == batch[j][0]:                       # chiave già presente: vince il nuovo valore
+                    i += 1
+                merged.append(batch[j])
+                j += 1
+        merged.extend(existing[i:])
+        merged.extend(batch[j:])
+
+        self._build(iter(merged), len(merged))
+
+    def save(self, path):
+        """
+        Salva il dizionario su file (formato di data_structures.snapshot) con le coppie in ordine di chiave
+        """
+        write_records(path, self.items(), self.count)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """
+        Ricostruisce un dizionario salvato con save in O(n), leggendo il file in streaming: le coppie sono già
+        in ordine, quindi riempio direttamente le foglie
+        """
+        count, records = read_records(path)
+        dict_instance = cls(**kwargs)
+        dict_instance._build(records, count, check=True)
+        return dict_instance
+
+    def _build(self, items, n, check=False):
+        """
+        Costruisce l'albero con i prossimi n elementi dell'iteratore ordinato items: distribuisco gli elementi in modo
+        uniforme sul minimo numero di foglie, poi raggruppo allo stesso modo ogni livello in nodi interni
+        Con check verifico che le chiavi siano strettamente crescenti
+        """
+        leaves = []
+        firsts = []                                     # chiave minima di ogni nodo del livello, per i separatori
+        groups = -(-n // self.order)                    # numero minimo di foglie
+        first = True
+        previous = None
+        for index in range(groups):
+            leaf = Leaf(self._new_keys(), [])
+            for _ in range(n * (index + 1) // groups - n * index // groups):
+                key, value = next(items)
+                if check and not first and not previous < key:
+                    raise ValueError("Lo snapshot non contiene chiavi in ordine strettamente crescente.")
+                first = False
+                previous = key
+                leaf.keys.append(key)
+                leaf.values.append(value)
+            if leaves:
+                leaves[-1].next = leaf
+            leaves.append(leaf)
+            firsts.append(leaf.keys[0])
+
+        level = leaves
+        sizes = [len(leaf.keys) for leaf in leaves]
+        while len(level) > 1:
+            groups = -(-len(level) // self.order)
+            parents, parent_firsts, parent_sizes = [], [], []
+            for index in range(groups):
+                start, stop = len(level) * index // groups, len(level) * (index + 1) // groups
+                parents.append(Internal(self._new_keys(firsts[start + 1:stop]), level[start:stop], sizes[start:stop]))
+                parent_firsts.append(firsts[start])
+                parent_sizes.append(sum(sizes[start:stop]))
+            level, firsts, sizes = parents, parent_firsts, parent_sizes
+
+        self.root = level[0] if level else Leaf(self._new_keys(), [])
+        self.count = n
+        self._version += 1
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return self.keys()
+
+    def keys(self):
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        for _, value in self.items():
+            yield value
+
+    def items(self):
+        """
+        Generatore delle coppie (chiave, valore) in ordine crescente di chiave, scorrendo le foglie collegate
+        Se il dizionario viene modificato durante l'iterazione lancia RuntimeError, come i dict di Python
+        """
+        return self.range()
+
+    def _leftmost_leaf(self):
+        node = self.root
+        while isinstance(node, Internal):
+            node = node.children[0]
+        return node
+
+    def _descend(self, key):
+        """
+        Scende dalla radice alla foglia che può contenere key
+        Restituisce la foglia e il percorso, cioè la lista delle coppie (nodo interno, indice del figlio scelto)
+        """
+        path = []
+        node = self.root
+        while isinstance(node, Internal):
+            index = bisect_right(node.keys, key)
+            path.append((node, index))
+            node = node.children[index]
+        return node, path
+
+    def insert(self, key, value):
+        leaf, path = self._descend(key)
+        keys = leaf.keys
+        index = bisect_left(keys, key)
+        if index < len(keys) and not key < keys[index]:     # chiave già presente: aggiorno il valore
+            leaf.values[index] = value
+            return
+
+        keys.insert(index, key)
+        leaf.values.insert(index, value)
+        self.count += 1
+        self._version += 1
+        for node, child in path:                        # una chiave in più in ogni sotto-albero del percorso
+            node.sizes[child] += 1
+        if len(keys) > self.order:
+            self._split_leaf(leaf, path)
+
+    def _split_leaf(self, leaf, path):
+        middle = len(leaf.keys) // 2
+        right = Leaf(leaf.keys[middle:], leaf.values[middle:])
+        del leaf.keys[middle:]
+        del leaf.values[middle:]
+        right.next = leaf.next
+        leaf.next = right
+        self._add_child(path, leaf, right, right.keys[0], len(right.keys))
+
+    def _split_internal(self, node, path):
+        middle = len(node.children) // 2
+        separator = node.keys[middle - 1]               # sale nel genitore
+        right = Internal(node.keys[middle:], node.children[middle:], node.sizes[middle:])
+        del node.keys[middle - 1:]
+        del node.children[middle:]
+        del node.sizes[middle:]
+        self._add_child(path, node, right, separator, sum(right.sizes))
+
+    def _add_child(self, path, left, right, separator, right_size):
+        """
+        Aggiunge right, nato dalla divisione di left, al genitore di left (l'ultimo nodo di path)
+        """
+        if not path:                                    # left era la radice: l'albero cresce di un livello
+            left_size = self.count - right_size
+            self.root = Internal(self._new_keys([separator]), [left, right], [left_size, right_size])
+            return
+
+        parent, index = path.pop()
+        parent.keys.insert(index, separator)
+        parent.children.insert(index + 1, right)
+        parent.sizes[index] -= right_size
+        parent.sizes.insert(index + 1, right_size)
+        if len(parent.children) > self.order:
+            self._split_internal(parent, path)
+
+    def search(self, key):
+        leaf, index = self._find(key)
+        if index >= 0:
+            return leaf.values[index]
+
+        # Se non trovo la chiave, lancio un'eccezione
+        raise KeyError(f"La chiave '{key}' non è presente nel dizionario.")
+
+    def _find(self, key):
+        """
+        Restituisce la foglia in cui si trova (o si troverebbe) la chiave e la sua posizione, -1 se non è presente
+        (senza lanciare eccezioni)
+        """
+        node = self.root
+        while isinstance(node, Internal):
+            node = node.children[bisect_right(node.keys, key)]
+        keys = node.keys
+        index = bisect_left(keys, key)
+        if index < len(keys) and not key < keys[index]:
+            return node, index
+        return node, -1
+
+    def _trace(self, key):
+        """
+        Percorso che una ricerca di key compie nell'albero, per le statistiche (vedi data_structures.stats):
+        nodi visitati, confronti fatti da bisect (log2 della dimensione del nodo) e profondità raggiunta
+        """
+        visited = comparisons = 0
+        node = self.root
+        while True:
+            visited += 1
+            comparisons += len(node.keys).bit_length()
+            if not isinstance(node, Internal):
+                break
+            node = node.children[bisect_right(node.keys, key)]
+        return {'nodes_visited': visited, 'comparisons': comparisons, 'depth': visited}
+
+    def search_many(self, keys, default=None):
+        """
+        Cerca una sequenza di chiavi senza lanciare eccezioni per quelle mancanti
+        Restituisce la lista dei valori (default per le chiavi assenti) e la maschera dei successi
+        """
+        values = []
+        hits = []
+        for key in keys:
+            leaf, index = self._find(key)
+            hits.append(index >= 0)
+            values.append(leaf.values[index] if index >= 0 else default)
+        return values, hits
+
+    def contains_many(self, keys):
+        return [self._find(key)[1] >= 0 for key in keys]
+
+    def delete_many(self, keys):
+        """
+        Cancella una sequenza di chiavi, quelle mancanti vengono ignorate
+        Restituisce la maschera delle chiavi effettivamente cancellate
+        """
+        return [self._remove(key) for key in keys]
+
+    def delete(self, key):
+        # Se non trovo la chiave, lancio un'eccezione
+        if not self._remove(key):
+            raise KeyError(f"Impossibile cancellare: la chiave '{key}' non è presente.")
+
+    def _remove(self, key):
+        """
+        Cancella la chiave, restituisce False se non è presente
+        I separatori dei nodi interni possono restare quelli di chiavi cancellate: continuano a dividere correttamente
+        """
+        leaf, path = self._descend(key)
+        index = bisect_left(leaf.keys, key)
+        if index == len(leaf.keys) or key < leaf.keys[index]:
+            return False
+
+        del leaf.keys[index]
+        del leaf.values[index]
+        self.count -= 1
+        self._version += 1
+        for node, child in path:
+            node.sizes[child] -= 1
+        self._rebalance(leaf, path)
+        return True
+
+    def _rebalance(self, node, path):
+        """
+        Risale il percorso finché un nodo ha meno di order // 2 chiavi (foglie) o figli (nodi interni):
+        se il nodo e un fratello adiacente stanno in un solo nodo li fondo, altrimenti ridistribuisco i loro elementi
+        """
+        minimum = self.order // 2
+        while path:
+            is_leaf = isinstance(node, Leaf)
+            if len(node.keys if is_leaf else node.children) >= minimum:
+                return
+
+            parent, index = path.pop()
+            separator = index - 1 if index > 0 else index       # separatore tra left e right nel genitore
+            left, right = parent.children[separator], parent.children[separator + 1]
+
+            if is_leaf:
+                if len(left.keys) + len(right.keys) <= self.order:
+                    left.keys += right.keys
+                    left.values += right.values
+                    left.next = right.next
+                else:
+                    keys, values = left.keys + right.keys, left.values + right.values
+                    half = len(keys) // 2
+                    left.keys, left.values = keys[:half], values[:half]
+                    right.keys, right.values = keys[half:], values[half:]
+                    parent.keys[separator] = right.keys[0]
+                    parent.sizes[separator], parent.sizes[separator + 1] = len(left.keys), len(right.keys)
+                    return
+            else:
+                if len(left.children) + len(right.children) <= self.order:
+                    left.keys.append(parent.keys[separator])    # il separatore scende tra i due gruppi
+                    left.keys += right.keys
+                    left.children += right.children
+                    left.sizes += right.sizes
+                else:
+                    keys = left.keys + self._new_keys([parent.keys[separator]]) + right.keys
+                    children, sizes = left.children + right.children, left.sizes + right.sizes
+                    half = len(children) // 2
+                    left.keys, left.children, left.sizes = keys[:half - 1], children[:half], sizes[:half]
+                    right.keys, right.children, right.sizes = keys[half:], children[half:], sizes[half:]
+                    parent.keys[separator] = keys[half - 1]
+                    parent.sizes[separator], parent.sizes[separator + 1] = sum(left.sizes), sum(right.sizes)
+                    return
+
+            # Fusione: right sparisce dal genitore, che potrebbe a sua volta avere troppi pochi figli
+            del parent.keys[separator]
+            del parent.children[separator + 1]
+            parent.sizes[separator] += parent.sizes.pop(separator + 1)
+            node = parent
+
+        if isinstance(self.root, Internal) and len(self.root.children) == 1:
+            self.root = self.root.children[0]           # la radice con un solo figlio è inutile: l'albero si abbassa
+
+    def range(self, lo=None, hi=None):
+        """
+        Generatore delle coppie (chiave, valore) con lo <= chiave < hi, in ordine crescente
+        Gli estremi None non pongono limiti; scendo una volta fino alla foglia di lo e poi scorro le foglie,
+        quindi il costo è O(altezza + k) per k risultati
+        """
+        version = self._version
+        if lo is None:
+            leaf, index = self._leftmost_leaf(), 0
+        else:
+            leaf, _ = self._descend(lo)
+            index = bisect_left(leaf.keys, lo)
+
+        while leaf is not None:
+            keys, values = leaf.keys, leaf.values
+            while index < len(keys):
+                if self._version != version:            # stesso controllo degli iteratori di ABRDict
+                    raise RuntimeError("Il dizionario è stato modificato durante l'iterazione.")
+                key = keys[index]
+                if hi is not None and not key < hi:
+                    return
+                yield key, values[index]
+                index += 1
+            leaf, index = leaf.next, 0
+        if self._version != version:
+            raise RuntimeError("Il dizionario è stato modificato durante l'iterazione.")
+
+    def floor(self, key):
+        """
+        Restituisce la coppia (chiave, valore) con la chiave più grande <= key
+        """
+        candidate = None                                # sotto-albero immediatamente a sinistra del percorso
+        node = self.root
+        while isinstance(node, Internal):
+            index = bisect_right(node.keys, key)
+            if index > 0:
+                candidate = node.children[index - 1]
+            node = node.children[index]
+
+        index = bisect_right(node.keys, key)
+        if index > 0:
+            return node.keys[index - 1], node.values[index - 1]
+        if candidate is None:
+            raise KeyError(f"Nessuna chiave minore o uguale a '{key}' nel dizionario.")
+        return self._max_of(candidate)
+
+    def ceiling(self, key):
+        """
+        Restituisce la coppia (chiave, valore) con la chiave più piccola >= key
+        """
+        leaf, _ = self._descend(key)
+        index = bisect_left(leaf.keys, key)
+        if index == len(leaf.keys):                     # tutte le chiavi della foglia sono minori: passo alla successiva
+            leaf, index = leaf.next, 0
+        if leaf is None:
+            raise KeyError(f"Nessuna chiave maggiore o uguale a '{key}' nel dizionario.")
+        return leaf.keys[index], leaf.values[index]
+
+    @staticmethod
+    def _max_of(node):
+        while isinstance(node, Internal):
+            node = node.children[-1]
+        return node.keys[-1], node.values[-1]
+
+    def min(self):
+        if self.count == 0:
+            raise KeyError("Il dizionario è vuoto.")
+        leaf = self._leftmost_leaf()
+        return leaf.keys[0], leaf.values[0]
+
+    def max(self):
+        if self.count == 0:
+            raise KeyError("Il dizionario è vuoto.")
+        return self._max_of(self.root)
+
+    def rank(self, key):
+        """
+        Restituisce il numero di chiavi strettamente minori di key, in O(altezza * order) grazie alle dimensioni
+        dei sotto-alberi memorizzate nei nodi interni
+        """
+        rank = 0
+        node = self.root
+        while isinstance(node, Internal):
+            index = bisect_right(node.keys, key)
+            rank += sum(node.sizes[:index])             # i sotto-alberi a sinistra contengono solo chiavi minori
+            node = node.children[index]
+        return rank + bisect_left(node.keys, key)
+
+    def select(self, i):
+        """
+        Restituisce la coppia (chiave, valore) di posizione i nell'ordine delle chiavi (0 = minimo, -1 = massimo)
+        """
+        n = self.count
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(f"Posizione {i} fuori dall'intervallo [0, {n}).")
+
+        node = self.root
+        while isinstance(node, Internal):
+            for index, size in enumerate(node.sizes):
+                if i < size:
+                    break
+                i -= size                               # salto l'intero sotto-albero
+            node = node.children[index]
+        return node.keys[i], node.values[i]
+
+    def height(self):
+        """
+        Restituisce l'altezza dell'albero (numero di livelli): tutte le foglie sono alla stessa profondità
+        """
+        height = 1
+        node = self.root
+        while isinstance(node, Internal):
+            height += 1
+            node = node.children[0]
+        return height
+
+    def __str__(self):
+        elements = [f"[{key}: {value}]" for key, value in self.items()]
+        return "{ " + ", ".join(elements) + " }"
@@ -0,0 +1,285 @@
+import time
+
+from data_structures.hash_table_dict import HashTableDict, next_prime
+from data_structures.linked_list_dict import Node
+from data_structures.node_pool import check_pool
+
+LRU = 'lru'                                             # si scarta la voce usata meno di recente
+LFU = 'lfu'                                             # si scarta la voce usata meno spesso (a parità, la meno recente)
+POLICIES = (LRU, LFU)
+_MISSING = object()                                     # sentinella per distinguere una mancata da un valore None
+
+
+class Entry(Node):
+    """
+    Classe che rappresenta una voce della cache: il nodo della lista doppiamente concatenata (con il numero
+    di accessi in hits) più l'istante di scadenza, None se la voce non scade
+    """
+    __slots__ = ('expires',)
+
+    def __init__(self, key, value):
+        super().__init__(key, value)
+        self.expires = None
+
+
+class RecencyList:
+    """
+    Classe che rappresenta una lista doppiamente concatenata di voci, dalla più recente (head) alla meno recente (tail)
+    Inserimento in testa, stacco di un nodo qualsiasi e rimozione dalla coda sono tutti O(1)
+    """
+    __slots__ = ('head', 'tail', 'count')
+
+    def __init__(self):
+        self.head = None
+        self.tail = None
+        self.count = 0
+
+    def push_front(self, node):
+        node.prev = None
+        node.next = self.head
+        if self.head is not None:
+            self.head.prev = node
+        else:                                           # lista vuota: il nodo è anche la coda
+            self.tail = node
+        self.head = node
+        self.count += 1
+
+    def unlink(self, node):
+        if node.prev is not None:
+            node.prev.next = node.next
+        else:
+            self.head = node.next
+        if node.next is not None:
+            node.next.prev = node.prev
+        else:
+            self.tail = node.prev
+        node.prev = node.next = None                    # il nodo staccato non trattiene i vicini
+        self.count -= 1
+
+
+class CacheDict:
+    """
+    Classe che rappresenta una cache con capacità limitata
+    Un HashTableDict associa a ogni chiave la sua voce, le voci sono collegate in liste doppiamente concatenate
+    ordinate per recenza: una sola lista con la politica LRU, una lista per ogni numero di accessi con LFU
+    (più il numero di accessi minimo, per trovare subito la lista da cui scartare); get, put e scarto sono O(1)
+    Le voci possono scadere dopo ttl secondi: la scadenza viene controllata quando la voce viene letta
+    (o con purge_expired) e una voce scaduta conta come mancata
+    on_evict(key, value, reason) viene chiamata per ogni voce scartata, con reason 'capacity' o 'expired'
+    """
+    node_class = Entry                                  # classe delle voci create dalla cache
+
+    def __init__(self, capacity, policy=LRU, ttl=None, on_evict=None, pool=None, clock=time.monotonic):
+        if capacity < 1:
+            raise ValueError("La capacità della cache deve essere almeno 1.")
+        if policy not in POLICIES:
+            raise ValueError(f"Politica '{policy}' non valida, scegliere tra {POLICIES}.")
+        check_pool(pool, self.node_class)
+        self.capacity = capacity
+        self.policy = policy
+        self.ttl = ttl                                  # durata di default delle voci in secondi (None = nessuna)
+        self.on_evict = on_evict
+        self.pool = pool                                # NodePool(Entry) opzionale per riciclare le voci scartate
+        self.clock = clock
+        self._index = HashTableDict(size=next_prime(capacity))     # già grande quanto serve: nessun ridimensionamento
+        self._recency = RecencyList()                   # LRU: tutte le voci
+        self._frequencies = {}                          # LFU: numero di accessi -> lista delle voci
+        self._min_frequency = 0
+        self._version = 0
+
+        # Contatori
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0                              # voci scartate per fare posto
+        self.expirations = 0                            # voci scartate perché scadute
+
+    @property
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self):
+        return len(self._index)
+
+    def __iter__(self):
+        return self.keys()
+
+    def keys(self):
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        for _, value in self.items():
+            yield value
+
+    def items(self):
+        """
+        Generatore delle coppie (chiave, valore) dalla prossima voce da conservare all'ultima (la prossima da scartare)
+        Non fa scadere voci e non conta accessi; come per LinkedListDict, anche le letture riordinano le voci,
+        quindi get e put durante l'iterazione lanciano RuntimeError
+        """
+        version = self._version
+        if self.policy == LRU:
+            lists = [self._recency]
+        else:
+            lists = [self._frequencies[hits] for hits in sorted(self._frequencies, reverse=True)]
+        now = self.clock()
+        for recency in lists:
+            current = recency.head
+            while current:
+                if self._version != version:
+                    raise RuntimeError("Il dizionario è stato modificato durante l'iterazione.")
+                if current.expires is None or current.expires > now:
+                    yield current.key, current.value
+                current = current.next
+        if self._version != version:
+            raise RuntimeError("Il dizionario è stato modificato durante l'iterazione.")
+
+    def _lookup(self, key, code=None):
+        """
+        Voce della chiave nell'indice, None se manca (senza eccezioni); code è il codice hash, se già calcolato
+        """
+        index = self._index
+        if code is None:
+            code = index._code(key)
+        node = index._find_node(key, code % index.size, code)
+        return node.value if node is not None else None
+
+    def _link(self, entry):
+        if self.policy == LRU:
+            self._recency.push_front(entry)
+            return
+        recency = self._frequencies.get(entry.hits)
+        if recency is None:
+            recency = self._frequencies[entry.hits] = RecencyList()
+        recency.push_front(entry)
+
+    def _unlink(self, entry):
+        if self.policy == LRU:
+            self._recency.unlink(entry)
+            return
+        recency = self._frequencies[entry.hits]
+        recency.unlink(entry)
+        if recency.count == 0:
+            del self._frequencies[entry.hits]
+            if self._min_frequency == entry.hits:
+                self._min_frequency += 1                # valido solo se la voce viene subito ricollegata con hits + 1
+
+    def _touch(self, entry):
+        """
+        Registra un accesso: la voce diventa la più recente (e con LFU passa alla lista successiva)
+        """
+        self._unlink(entry)
+        entry.hits += 1
+        self._link(entry)
+        self._version += 1
+
+    def _drop(self, entry, reason):
+        """
+        Rimuove la voce dalla cache; se reason non è None la voce è stata scartata e va notificata
+        """
+        self._unlink(entry)
+        self._index.delete(entry.key)
+        self._version += 1
+        key, value = entry.key, entry.value
+        if self.pool is not None:
+            self.pool.release(entry)
+        if reason == 'capacity':
+            self.evictions += 1
+        elif reason == 'expired':
+            self.expirations += 1
+        if reason is not None and self.on_evict is not None:
+            self.on_evict(key, value, reason)
+
+    def _victim(self):
+        if self.policy == LRU:
+            return self._recency.tail
+        if self._min_frequency not in self._frequencies:       # la lista minima è stata svuotata da delete o scadenze
+            self._min_frequency = min(self._frequencies)
+        return self._frequencies[self._min_frequency].tail
+
+    def get(self, key, default=None):
+        """
+        Restituisce il valore della chiave (registrando l'accesso), default se manca o è scaduta
+        """
+        entry = self._lookup(key)
+        if entry is not None and entry.expires is not None and entry.expires <= self.clock():
+            self._drop(entry, 'expired')
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self._touch(entry)
+        return entry.value
+
+    def search(self, key):
+        """
+        Come get, ma lancia KeyError se la chiave manca o è scaduta (stessa interfaccia degli altri dizionari)
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(f"La chiave '{key}' non è presente nella cache.")
+        return value
+
+    def put(self, key, value, ttl=None):
+        """
+        Inserisce o aggiorna una voce; ttl sostituisce la durata di default della cache
+        Se la cache è piena scarta prima la voce indicata dalla politica
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires = self.clock() + ttl if ttl is not None else None
+
+        code = self._index._code(key)                   # calcolato una volta per la ricerca e l'eventuale inserimento
+        entry = self._lookup(key, code)
+        if entry is not None:                           # aggiornamento: conta come accesso
+            entry.value = value
+            entry.expires = expires
+            self._touch(entry)
+            return
+
+        if len(self._index) >= self.capacity:
+            self._drop(self._victim(), 'capacity')
+
+        entry = self.pool.acquire(key, value) if self.pool is not None else self.node_class(key, value)
+        entry.expires = expires
+        entry.hits = 1
+        self._link(entry)
+        self._min_frequency = 1
+        self._index._add(key, entry, code)              # la chiave è assente: nessuna seconda ricerca
+        self._version += 1
+
+    def insert(self, key, value):
+        self.put(key, value)
+
+    def delete(self, key):
+        """
+        Rimuove la voce senza chiamare on_evict, lancia KeyError se la chiave non è presente
+        """
+        entry = self._lookup(key)
+        if entry is None:
+            raise KeyError(f"Impossibile cancellare: la chiave '{key}' non è presente.")
+        self._drop(entry, None)
+
+    def purge_expired(self):
+        """
+        Scarta tutte le voci scadute in O(n) e restituisce quante sono state rimosse
+        """
+        now = self.clock()
+        expired = [entry for _, entry in self._index.items() if entry.expires is not None and entry.expires <= now]
+        for entry in expired:
+            self._drop(entry, 'expired')
+        return len(expired)
+
+    def clear(self):
+        """
+        Svuota la cache senza chiamare on_evict (i contatori restano)
+        """
+        for _, entry in list(self._index.items()):
+            self._drop(entry, None)
+        self._min_frequency = 0
+
+    def __str__(self):
+        elements = [f"[{key}: {value}]" for key, value in self.items()]
+        return "{ " + ", ".join(elements) + " }"
@@ -0,0 +1,149 @@
+import threading
+
+from data_structures.hash_table_dict import Node, next_prime
+from data_structures.hashing import fibonacci_hash
+
+SLOT_MASK = (1 << 32) - 1                                           # bit bassi dell'hash: slot nel segmento
+
+
+class Segment:
+    """
+    Classe che rappresenta un segmento della tabella concorrente: un gruppo di slot con il proprio lock
+    Il numero di elementi e la tabella di ogni segmento cambiano solo tenendo il lock del segmento
+    """
+    __slots__ = ('lock', 'table', 'count')
+
+    def __init__(self, size):
+        self.lock = threading.Lock()
+        self.table = [None] * size                                  # slot del segmento, ognuno con la sua lista
+        self.count = 0
+
+
+class ConcurrentHashTableDict:
+    """
+    Classe che rappresenta un dizionario basato su tabelle hash condivisibile tra thread (lock striping)
+    Le chiavi sono ripartite tra più segmenti indipendenti, ognuno protetto dal proprio lock: scritture su segmenti
+    diversi procedono in parallelo e un ridimensionamento blocca solo il proprio segmento
+    Le letture non prendono lock: i nodi vengono pubblicati già completi e un ridimensionamento costruisce una nuova
+    tabella con nodi copiati, lasciando intatta la vecchia per i lettori che la stanno ancora visitando
+    Le chiavi possono essere di qualunque tipo hashable: l'hash di Fibonacci (data_structures.hashing) sceglie il
+    segmento con i bit alti e lo slot con quelli bassi, così anche le chiavi a passo regolare usano tutti i segmenti
+    """
+    def __init__(self, concurrency=16, size=11, max_load_factor=1.0, min_load_factor=0.125):
+        """
+        concurrency è il numero di segmenti (e quindi di lock), size la dimensione iniziale di ogni segmento
+        """
+        self.concurrency = concurrency
+        self.min_size = size
+        self.max_load_factor = max_load_factor
+        self.min_load_factor = min_load_factor
+        self._segments = [Segment(size) for _ in range(concurrency)]
+
+    def _locate(self, key):
+        """
+        Restituisce il segmento della chiave e il codice da cui ricavare lo slot al suo interno
+        """
+        code = fibonacci_hash(key)
+        return self._segments[(code >> 32) % self.concurrency], code & SLOT_MASK
+
+    def insert(self, key, value):
+        segment, code = self._locate(key)
+        with segment.lock:
+            table = segment.table
+            index = code % len(table)
+            current = table[index]
+            while current:
+                if current.key == key:
+                    current.value = value                           # aggiorno il valore se la chiave esiste già
+                    return
+                current = current.next
+
+            new_node = Node(key, value)                             # il nodo è completo prima di essere pubblicato
+            new_node.next = table[index]
+            table[index] = new_node
+            segment.count += 1
+
+            if segment.count > self.max_load_factor * len(table):
+                self._resize(segment, next_prime(len(table) * 2 + 1))
+
+    def search(self, key):
+        segment, code = self._locate(key)
+        table = segment.table                                       # lettura senza lock di una tabella coerente
+        current = table[code % len(table)]
+        while current:
+            if current.key == key:
+                return current.value
+            current = current.next
+
+        raise KeyError(f"La chiave '{key}' non è presente nel dizionario.")
+
+    def delete(self, key):
+        segment, code = self._locate(key)
+        with segment.lock:
+            table = segment.table
+            index = code % len(table)
+            current = table[index]
+            previous = None
+            while current:
+                if current.key == key:
+                    # Stacco il nodo senza toccarne il next: un lettore fermo su di esso può proseguire la visita
+                    if previous is None:
+                        table[index] = current.next
+                    else:
+                        previous.next = current.next
+                    segment.count -= 1
+
+                    if len(table) > self.min_size and segment.count < self.min_load_factor * len(table):
+                        self._resize(segment, max(self.min_size, next_prime(len(table) // 2)))
+                    return
+                previous = current
+                current = current.next
+
+        raise KeyError(f"Impossibile cancellare: la chiave '{key}' non è presente.")
+
+    def _resize(self, segment, new_size):
+        """
+        Ricostruisce la tabella del segmento (il chiamante tiene il lock del segmento)
+        I nodi vengono copiati e non ricollegati, poi la nuova tabella viene pubblicata con un solo assegnamento
+        """
+        new_table = [None] * new_size
+        for head in segment.table:
+            current = head
+            while current:
+                index = (fibonacci_hash(current.key) & SLOT_MASK) % new_size
+                new_node = Node(current.key, current.value)
+                new_node.next = new_table[index]
+                new_table[index] = new_node
+                current = current.next
+        segment.table = new_table
+
+    def __len__(self):
+        return sum(segment.count for segment in self._segments)
+
+    def __iter__(self):
+        return self.keys()
+
+    def keys(self):
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        for _, value in self.items():
+            yield value
+
+    def items(self):
+        """
+        Generatore delle coppie (chiave, valore) debolmente consistente: non lancia eccezioni se altri thread
+        modificano il dizionario, e ogni segmento viene visitato sulla tabella che era pubblicata quando la visita
+        lo raggiunge
+        """
+        for segment in self._segments:
+            for head in segment.table:
+                current = head
+                while current:
+                    yield current.key, current.value
+                    current = current.next
+
+    def __str__(self):
+        elements = [f"[{key}: {value}]" for key, value in self.items()]
+        return "{ " + ", ".join(elements) + " }"
@@ -1,7 +1,15 @@
+from data_structures.hashing import (FIBONACCI_MULTIPLIER, MASK_64, VECTOR_HASH_FUNCTIONS, fibonacci_hash,
+                                    modulo_hash, optional_numpy, resolve_hash_function)
+from data_structures.node_pool import check_pool
+from data_structures.shared_hash_table import SharedHashTable, stable_hash, write_table
+
+
 class Node:
     """
         Classe che rappresenta un nodo dell'hash
     """
+    __slots__ = ('key', 'value', 'next')
+
     def __init__(self, key, value):
         self.key = key
         self.value = value
@@ -11,75 +19,434 @@ class Node:
         return f"Node(key={self.key}, value={self.value})"
 
 
+REHASH_STEP = 4                                                     # slot migrati per ogni operazione di scrittura
+
+
+def is_prime(n):
+    """
+    Controllo di primalità per divisione, sufficiente per le dimensioni delle tabelle
+    """
+    if n < 2:
+        return False
+    return all(n % i for i in range(2, int(n ** 0.5) + 1))
+
+
+def next_prime(n):
+    """
+    Restituisce il più piccolo numero primo maggiore o uguale a n
+    """
+    while not is_prime(n):
+        n += 1
+    return n
+
+
 class HashTableDict:
     """
     Classe che rappresenta un dizionario basato su tabelle hash
+    La tabella si ridimensiona da sola in base al fattore di carico: quando serve crescere (o restringersi) viene
+    allocata una nuova tabella e gli slot vengono migrati poco alla volta a ogni scrittura (rehash incrementale),
+    così nessuna operazione paga da sola il costo di spostare tutti gli elementi
+    Le chiavi possono essere di qualunque tipo hashable; hash_function sceglie come ricavare lo slot
+    (vedi data_structures.hashing): 'fibonacci' (default), 'modulo' (l'originale key % size) o 'keyed'
+    per chiavi scelte da terzi, oppure una funzione chiave -> intero
     """
-    def __init__(self, size=11):
+    node_class = Node                                               # classe dei nodi creati dal dizionario
+
+    def __init__(self, size=11, max_load_factor=1.0, min_load_factor=0.125, auto_resize=True, pool=None,
+                 hash_function='fibonacci'):
         """
         Inizializzo la tabella hash, uso numero primo come size per migliorare la distribuzione delle chiavi
         e ridurre collisioni
         self.table è una lista Python che funge da array, inizializzo la tabella con None
+        size è anche la dimensione minima: la tabella non si restringe mai sotto questo valore
+        Se viene passato un NodePool, i nodi cancellati vengono riciclati dagli inserimenti successivi
         """
+        check_pool(pool, self.node_class)
         self.size = size
         self.table = [None] * self.size                             # ogni cella verrà chiamata 'slot'
+        self.count = 0                                              # numero di coppie memorizzate
+        self.min_size = size
+        self.max_load_factor = max_load_factor                      # oltre questo carico la tabella cresce
+        self.min_load_factor = min_load_factor                      # sotto questo carico la tabella si restringe
+        self.auto_resize = auto_resize
+        self.pool = pool
+        self.hash_function = resolve_hash_function(hash_function)
+        self._int_fibonacci = self.hash_function is fibonacci_hash  # percorsi veloci di _code per le chiavi int
+        self._int_identity = self.hash_function is modulo_hash
+        self._version = 0                                           # cambia a ogni modifica strutturale
+        self._iterators = 0                                         # iteratori aperti (le letture non migrano slot)
 
-    def _hash(self, key):
-        if not isinstance(key, int):                                # mi assicuro che la chiave sia un intero
-            raise TypeError("La chiave deve essere un intero.")
-        return key % self.size                                      # uso l'operatore modulo
+        # Stato del rehash incrementale: tabella vecchia in fase di svuotamento e prossimo slot da migrare
+        self._old_table = None
+        self._old_size = 0
+        self._rehash_index = 0
 
-    def insert(self, key, value):
-        index = self._hash(key)                                     # calcolo indice dello slot usando la funzione hash
-        head = self.table[index]                                    # accedo alla testa della lista nello slot
+    def _code(self, key):
+        """
+        Codice hash della chiave; per le chiavi int con le funzioni predefinite il calcolo è in linea, senza chiamate
+        """
+        if type(key) is int:
+            if self._int_fibonacci:
+                code = (key * FIBONACCI_MULTIPLIER) & MASK_64
+                return code ^ (code >> 32)
+            if self._int_identity:
+                return key
+        return self.hash_function(key)
 
-        current = head                                              # scorro la lista per vedere se chiave esiste già
-        while current:
-            if current.key == key:
-                current.value = value                               # aggiorno il valore se la chiave esiste già
-                return
-            current = current.next
+    def _hash(self, key, size=None):
+        return self._code(key) % (self.size if size is None else size)
+
+    def _slot_indices(self, keys):
+        """
+        Calcola gli indici degli slot per una lista di chiavi
+        Con NumPy disponibile, chiavi intere a 64 bit e una funzione hash che ha una versione vettoriale
+        (vedi VECTOR_HASH_FUNCTIONS) calcolo tutti gli indici con un'unica operazione, altrimenti chiave per chiave
+        """
+        vector_hash = VECTOR_HASH_FUNCTIONS.get(self.hash_function)
+        np = optional_numpy() if vector_hash is not None and keys else None     # importato solo qui, se serve
+        if np is not None:
+            try:
+                array = np.array(keys)
+            except ValueError:                                      # tuple di lunghezze diverse e simili
+                array = None
+            # Solo interi con segno a 64 bit (bool compresi, come per isinstance): le chiavi in [2^63, 2^64) danno un
+            # array uint64 che la conversione a int64 altererebbe, le tuple di interi un array a più dimensioni
+            if array is not None and array.ndim == 1 and array.dtype.kind in 'ib':
+                return vector_hash(array.astype(np.int64), self.size).tolist()
+        return [self._hash(key) for key in keys]
+
+    @classmethod
+    def from_items(cls, items, **kwargs):
+        """
+        Costruisce un nuovo dizionario a partire da una sequenza di coppie chiave-valore,
+        con la tabella dimensionata fin da subito per contenerle tutte
+        """
+        dict_instance = cls(**kwargs)
+        dict_instance.bulk_insert(items)
+        return dict_instance
+
+    def bulk_insert(self, items):
+        """
+        Inserisce una sequenza di coppie chiave-valore in un solo passaggio: prima porto la tabella alla dimensione
+        finale (nessun rehash durante il caricamento), poi calcolo tutti gli indici insieme e inserisco le coppie
+        """
+        items = list(items)
+        self._reserve(self.count + len(items))
+
+        table = self.table
+        indexes = self._slot_indices([key for key, _ in items])
+        for (key, value), index in zip(items, indexes):
+            current = table[index]
+            while current:
+                if current.key == key:
+                    current.value = value                           # chiave già presente: aggiorno il valore
+                    break
+                current = current.next
+            else:
+                new_node = self.pool.acquire(key, value) if self.pool is not None else self.node_class(key, value)
+                new_node.next = table[index]
+                table[index] = new_node
+                self.count += 1
+                self._version += 1
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return self.keys()
+
+    def keys(self):
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        for _, value in self.items():
+            yield value
+
+    def items(self):
+        """
+        Generatore delle coppie (chiave, valore), slot per slot, senza copie intermedie
+        Durante un rehash visito prima la tabella vecchia e poi quella nuova
+        Se il dizionario viene modificato durante l'iterazione lancia RuntimeError, come i dict di Python
+        """
+        version = self._version
+        tables = [self.table] if self._old_table is None else [self._old_table, self.table]
+        self._iterators += 1
+        try:
+            for table in tables:
+                for head in table:
+                    current = head
+                    while current:
+                        if self._version != version:
+                            raise RuntimeError("Il dizionario è stato modificato durante l'iterazione.")
+                        yield current.key, current.value
+                        current = current.next
+            if self._version != version:
+                raise RuntimeError("Il dizionario è stato modificato durante l'iterazione.")
+        finally:
+            self._iterators -= 1
+
+    def _reserve(self, needed):
+        """
+        Porta subito la tabella a una dimensione adatta a contenere needed coppie, completando ogni rehash,
+        così i successivi inserimenti non provocano ridimensionamenti
+        """
+        if self._old_table is not None:                             # completo l'eventuale rehash in corso
+            self._rehash_step(self._old_size)
+
+        if self.auto_resize and needed > self.max_load_factor * self.size:
+            self._start_resize(next_prime(int(needed / self.max_load_factor) + 1))
+            self._rehash_step(self._old_size)                       # migro subito tutti gli slot
+
+    def save(self, path):
+        """
+        Salva il dizionario su file con il layout binario di SharedHashTable (slot e arena delle coppie),
+        che può essere anche mappato in memoria direttamente con SharedHashTable.open_file
+        Il layout supporta solo le chiavi di stable_hash (numeri, stringhe, bytes e tuple di questi tipi): le controllo
+        tutte prima di aprire il file, così una chiave non supportata non lascia un file incompleto
+        """
+        for key in self.keys():
+            stable_hash(key)                                        # lancia TypeError per le chiavi non supportate
+        with open(path, 'wb') as file:
+            write_table(file, self.items(), self.count)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """
+        Ricostruisce un dizionario salvato con save: il file viene mappato in memoria e le coppie lette una alla volta
+        in una tabella già dimensionata, quindi non servono né una copia completa del file né dei rehash
+        """
+        table = SharedHashTable.open_file(path)
+        try:
+            dict_instance = cls(**kwargs)
+            dict_instance._reserve(len(table))
+            for key, value in table.items():
+                dict_instance.insert(key, value)
+        finally:
+            table.close()
+        return dict_instance
+
+    def chain_lengths(self):
+        """
+        Istogramma delle lunghezze delle liste: l'elemento i è il numero di slot con esattamente i nodi
+        (gli slot vuoti compresi); durante un rehash conta gli slot di entrambe le tabelle
+        Utile per confrontare le funzioni hash su una data distribuzione di chiavi
+        """
+        histogram = [0]
+        tables = [self.table] if self._old_table is None else [self._old_table, self.table]
+        for table in tables:
+            for head in table:
+                length = 0
+                current = head
+                while current:
+                    length += 1
+                    current = current.next
+                if length >= len(histogram):
+                    histogram.extend([0] * (length + 1 - len(histogram)))
+                histogram[length] += 1
+        return histogram
+
+    def load_factor(self):
+        return self.count / self.size
+
+    def is_rehashing(self):
+        return self._old_table is not None
 
+    def insert(self, key, value):
+        code = self._code(key)                                      # calcolo indice dello slot usando la funzione hash
+        node = self._find_node(key, code % self.size, code)
+        if node is not None:
+            node.value = value                                      # aggiorno il valore se la chiave esiste già
+            return
+        self._add(key, value, code)
+
+    def _add(self, key, value, code):
+        """
+        Aggiunge una chiave che il chiamante ha già verificato essere assente, dato il suo codice hash (vedi _code)
+        """
+        self._rehash_step()                                         # migro qualche slot della tabella vecchia
+        index = code % self.size
         # Creo un nuovo nodo se la chiave non esiste e lo inserisco in testa alla lista
-        new_node = Node(key, value)
-        new_node.next = head                                        # il next del nuovo nodo punta alla vecchia testa
+        new_node = self.pool.acquire(key, value) if self.pool is not None else self.node_class(key, value)
+        new_node.next = self.table[index]                           # il next del nuovo nodo punta alla vecchia testa
         self.table[index] = new_node                                # aggiorno la testa della lista nello slot
+        self.count += 1
+        self._version += 1
+
+        if self.auto_resize and self.count > self.max_load_factor * self.size:
+            self._start_resize(next_prime(self.size * 2 + 1))       # la tabella è troppo piena: raddoppio
 
     def search(self, key):
-        index = self._hash(key)                                     # calcolo indice dello slot usando la funzione hash
+        if self._old_table is not None and not self._iterators:    # anche le letture fanno avanzare il rehash
+            self._rehash_step()
+        code = self._code(key)
+        node = self._find_node(key, code % self.size, code)
+        if node is None:                                            # se non trovo la chiave lancio eccezione
+            raise KeyError(f"La chiave '{key}' non è presente nel dizionario.")
+        return node.value                                           # restituisco il valore associato
 
+    def _find_node(self, key, index, code=None):
+        """
+        Cerca il nodo con la chiave data nello slot index della tabella corrente e, se è in corso un rehash,
+        nello slot corrispondente della tabella vecchia (gli slot già migrati sono vuoti)
+        Se il chiamante conosce già il codice hash della chiave lo passa in code, così non lo ricalcolo
+        Restituisce None se la chiave non è presente
+        """
         current = self.table[index]
         while current:                                              # scorro la lista nello slot
             if current.key == key:
-                return current.value                                # restituisco il valore associato se trovo la chiave
+                return current
             current = current.next
 
-        raise KeyError(f"La chiave '{key}' non è presente nel dizionario.")    # se non trovo la chiave lancio eccezione
+        if self._old_table is not None:
+            if code is None:
+                code = self._code(key)
+            current = self._old_table[code % self._old_size]
+            while current:
+                if current.key == key:
+                    return current
+                current = current.next
+        return None
+
+    def _trace(self, key):
+        """
+        Percorso che una ricerca di key compie nella tabella, per le statistiche (vedi data_structures.stats):
+        nodi visitati e confronti fino alla chiave (o fino alla fine della lista) e lunghezza delle liste degli slot
+        della chiave, compreso quello della tabella vecchia durante un rehash
+        """
+        visited = chain = 0
+        found = False
+        chains = [self.table[self._hash(key)]]
+        if self._old_table is not None:
+            chains.append(self._old_table[self._hash(key, self._old_size)])
+        for current in chains:
+            while current:
+                chain += 1
+                if not found:
+                    visited += 1
+                    found = current.key == key
+                current = current.next
+        return {'nodes_visited': visited, 'comparisons': visited, 'chain_length': chain}
+
+    def search_many(self, keys, default=None):
+        """
+        Cerca una sequenza di chiavi senza lanciare eccezioni per quelle mancanti
+        Gli indici degli slot sono calcolati tutti insieme (un solo modulo NumPy per chiavi intere)
+        Restituisce la lista dei valori (default per le chiavi assenti) e la maschera dei successi
+        """
+        keys = list(keys)
+        if self._old_table is not None and not self._iterators:
+            self._rehash_step(REHASH_STEP * len(keys))
+        values = []
+        hits = []
+        for key, index in zip(keys, self._slot_indices(keys)):
+            node = self._find_node(key, index)
+            hits.append(node is not None)
+            values.append(node.value if node is not None else default)
+        return values, hits
+
+    def contains_many(self, keys):
+        return self.search_many(keys)[1]
+
+    def delete_many(self, keys):
+        """
+        Cancella una sequenza di chiavi, quelle mancanti vengono ignorate
+        Restituisce la maschera delle chiavi effettivamente cancellate
+        """
+        return [self._remove(key) for key in keys]
 
     def delete(self, key):
-        index = self._hash(key)                                     # calcolo indice dello slot usando la funzione hash
+        if not self._remove(key):                                   # se non trovo la chiave lancio un'eccezione
+            raise KeyError(f"Impossibile cancellare: la chiave '{key}' non è presente.")
+
+    def _remove(self, key):
+        """
+        Cancella la coppia con la chiave data, restituisce False se la chiave non è presente
+        """
+        code = self._code(key)
+        node = self._unlink(self.table, code % self.size, key)
+        if node is None and self._old_table is not None:
+            node = self._unlink(self._old_table, code % self._old_size, key)
+        if node is None:
+            return False
+        self.count -= 1
+        self._version += 1
+        if self.pool is not None:
+            self.pool.release(node)
+
+        self._rehash_step()
 
-        current =self.table[index]                                  # scorro tenendo traccia del nodo precedente
+        if (self.auto_resize and self._old_table is None and self.size > self.min_size
+                and self.count < self.min_load_factor * self.size):
+            self._start_resize(max(self.min_size, next_prime(self.size // 2)))     # troppo vuota: dimezzo
+        return True
+
+    @staticmethod
+    def _unlink(table, index, key):
+        """
+        Stacca dalla lista dello slot index il nodo con la chiave data e lo restituisce, None se non lo trova
+        """
+        current = table[index]                                      # scorro tenendo traccia del nodo precedente
         previous = None                                             # previous serve per collegare nodi quando cancello
         while current:
             if current.key == key:
                 if previous is None:
-                    self.table[index] = current.next                # se la chiave da cancellare è in testa
+                    table[index] = current.next                     # se la chiave da cancellare è in testa
                 else:
                     previous.next = current.next                    # se la chiave da cancellare non è in testa
-                return                                              # cancellazione
+                return current
 
             previous = current                                      # scorro la lista aggiornando previous e current
             current = current.next
+        return None
 
-        # Se non trovo la chiave lancio un'eccezione
-        raise KeyError(f"Impossibile cancellare: la chiave '{key}' non è presente.")
+    def _start_resize(self, new_size):
+        if self._old_table is not None:                             # un solo rehash alla volta: completo il precedente
+            self._rehash_step(self._old_size)
+
+        self._old_table = self.table                                # la tabella corrente diventa quella da svuotare
+        self._old_size = self.size
+        self._rehash_index = 0
+        self.size = new_size
+        self.table = [None] * new_size
+
+    def _rehash_step(self, steps=REHASH_STEP):
+        """
+        Migra nella tabella corrente fino a steps slot non vuoti della tabella vecchia
+        Per non bloccarsi su lunghe sequenze di slot vuoti ne visito al massimo 10 * steps
+        La migrazione avviene nelle scritture che cambiano la struttura (aggiornare il valore di una chiave presente
+        o cancellare una chiave assente non sposta nodi) e nelle ricerche fatte senza iteratori aperti, così una
+        tabella che resta a metà rehash finisce di migrare anche se da lì in poi viene solo letta
+        Sposta i nodi sotto gli iteratori: cambia _version
+        """
+        if self._old_table is None:
+            return
+
+        old_table = self._old_table
+        empty_visits = steps * 10
+        while steps > 0 and self._rehash_index < self._old_size:
+            current = old_table[self._rehash_index]
+            if current is None:
+                empty_visits -= 1
+                if empty_visits == 0:
+                    break
+            else:
+                old_table[self._rehash_index] = None
+                self._version += 1
+                while current:                                      # sposto ogni nodo in testa al nuovo slot
+                    next_node = current.next
+                    index = self._hash(current.key)
+                    current.next = self.table[index]
+                    self.table[index] = current
+                    current = next_node
+                steps -= 1
+            self._rehash_index += 1
+
+        if self._rehash_index >= self._old_size:                    # migrazione completata
+            self._old_table = None
+            self._old_size = 0
+            self._rehash_index = 0
 
     def __str__(self):
-        elements = []
-        for i in range(self.size):
-            current = self.table[i]
-            while current:
-                elements.append(f"[{current.key}: {current.value}]")
-                current = current.next
+        elements = [f"[{key}: {value}]" for key, value in self.items()]
         return "{ " + ", ".join(elements) + " }"
@@ -0,0 +1,114 @@
+import os
+import struct
+from hashlib import blake2b
+
+FIBONACCI_MULTIPLIER = 11400714819323198485                         # 2^64 / sezione aurea
+MASK_64 = (1 << 64) - 1
+SECRET_KEY = os.urandom(16)                                         # chiave di processo per keyed_hash
+
+_numpy = None
+_numpy_checked = False
+
+
+def optional_numpy():
+    """
+    Restituisce il modulo numpy, None se non è installato
+    L'import avviene alla prima operazione vettoriale: chi non le usa non paga il caricamento di NumPy all'avvio
+    """
+    global _numpy, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            pass
+        _numpy_checked = True
+    return _numpy
+
+
+def modulo_hash(key):
+    """
+    Funzione di riferimento: le chiavi intere restano invariate (l'indice dello slot è key % size, come in origine),
+    le altre chiavi usano il codice di hash() di Python
+    """
+    return key if isinstance(key, int) else hash(key)
+
+
+def fibonacci_hash(key):
+    """
+    Hash moltiplicativo di Fibonacci sul codice di modulo_hash: la moltiplicazione sparge le chiavi vicine o con passo
+    regolare (multipli di 1000, identificativi con passo pari alla dimensione della tabella) su tutti i 64 bit,
+    poi ripiego i bit alti su quelli bassi perché il modulo per la dimensione della tabella li veda
+    """
+    code = ((key if isinstance(key, int) else hash(key)) * FIBONACCI_MULTIPLIER) & MASK_64     # modulo_hash in linea
+    return code ^ (code >> 32)
+
+
+def _canonical_bytes(key):
+    """
+    Codifica in byte di una chiave, uguale per chiavi uguali (1, 1.0 e True hanno la stessa codifica) e diversa
+    per chiavi diverse, come in shared_hash_table.stable_hash: gli interi sono codificati per intero, non ridotti
+    modulo 2^61 - 1 come fa hash()
+    Per i tipi senza una codifica propria (frozenset, None, oggetti definiti dall'utente...) uso il codice di hash()
+    """
+    if isinstance(key, float) and key.is_integer():
+        key = int(key)                                              # 1.0 == 1: stessa codifica
+    if isinstance(key, int):
+        return b'i' + key.to_bytes(key.bit_length() // 8 + 1, 'little', signed=True)
+    if isinstance(key, str):
+        return b's' + key.encode('utf-8', 'surrogatepass')
+    if isinstance(key, (bytes, bytearray)):
+        return b'b' + bytes(key)
+    if isinstance(key, float):
+        return b'f' + struct.pack('<d', key)
+    if isinstance(key, tuple):
+        parts = [_canonical_bytes(item) for item in key]
+        return b't' + b''.join(len(part).to_bytes(4, 'little') + part for part in parts)
+    return _canonical_bytes(hash(key))
+
+
+def keyed_hash(key):
+    """
+    Hash con chiave segreta (BLAKE2b a 64 bit, con lo stesso ruolo di SipHash) per chiavi scelte da terzi:
+    senza conoscere SECRET_KEY non si possono costruire interi, float, stringhe, bytes o tuple di questi tipi
+    che collidono nello stesso slot
+    Gli altri tipi passano dal codice di hash() e non hanno questa garanzia
+    """
+    digest = blake2b(_canonical_bytes(key), digest_size=8, key=SECRET_KEY).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def _modulo_vector(array, size):
+    return array % size
+
+
+def _fibonacci_vector(array, size):
+    np = optional_numpy()
+    with np.errstate(over='ignore'):                                # la moltiplicazione deve troncare a 64 bit
+        code = array.view(np.uint64) * np.uint64(FIBONACCI_MULTIPLIER)
+    return (code ^ (code >> np.uint64(32))) % np.uint64(size)
+
+
+HASH_FUNCTIONS = {
+    'modulo': modulo_hash,
+    'fibonacci': fibonacci_hash,
+    'keyed': keyed_hash
+}
+
+# Versioni NumPy (array di int64 -> indici degli slot) delle funzioni che le hanno, usate per i caricamenti in blocco
+VECTOR_HASH_FUNCTIONS = {
+    modulo_hash: _modulo_vector,
+    fibonacci_hash: _fibonacci_vector
+}
+
+
+def resolve_hash_function(hash_function):
+    """
+    Accetta il nome di una funzione di HASH_FUNCTIONS o una qualunque funzione chiave -> intero
+    """
+    if callable(hash_function):
+        return hash_function
+    try:
+        return HASH_FUNCTIONS[hash_function]
+    except KeyError:
+        raise ValueError(f"Funzione hash '{hash_function}' non valida, scegliere tra {tuple(HASH_FUNCTIONS)}.") from None
@@ -1,14 +1,28 @@
+from data_structures.node_pool import check_pool
+from data_structures.snapshot import read_records, write_records
+
+# Politiche di auto-organizzazione: dopo ogni accesso riuscito il nodo trovato si avvicina alla testa
+MOVE_TO_FRONT = 'move_to_front'                         # il nodo viene spostato in testa
+TRANSPOSE = 'transpose'                                 # il nodo viene scambiato con il precedente
+FREQUENCY = 'frequency'                                 # la lista resta ordinata per numero di accessi
+POLICIES = (None, MOVE_TO_FRONT, TRANSPOSE, FREQUENCY)
+
+
 class Node:
     """
     Classe che rappresenta un nodo della lista concatenata
-    Ogni nodo contiene una coppia chiave-valore e un puntatore al prossimo nodo
+    Ogni nodo contiene una coppia chiave-valore, i puntatori al nodo precedente e al prossimo
+    e il numero di accessi (usato dalla politica FREQUENCY)
     """
+    __slots__ = ('key', 'value', 'next', 'prev', 'hits')   # niente __dict__ per ogni nodo: layout compatto
 
     # Costruttore (init)
     def __init__(self, key, value):
         self.key = key
         self.value = value
         self.next = None                                # inizialmente il puntatore al prossimo nodo è nullo
+        self.prev = None                                # e anche quello al nodo precedente
+        self.hits = 0
 
     # Metodo per rappresentare il nodo come stringa (str)
     def __str__(self):
@@ -17,66 +31,295 @@ class Node:
 
 class LinkedListDict:
     """
-    Classe che rappresenta un dizionario basato su una lista concatenata
+    Classe che rappresenta un dizionario basato su una lista concatenata (doppiamente collegata)
+    policy sceglie come la lista si riorganizza dopo gli accessi (vedi POLICIES), così le chiavi usate spesso
+    migrano verso la testa e vengono trovate prima; con indexed=True un dict di Python affianca la lista e associa
+    a ogni chiave il suo nodo: ricerca, aggiornamento e cancellazione diventano O(1) e l'ordine della lista
+    (quello di inserimento, dalla più recente, se policy è None) resta quello dell'iterazione
+    Se viene passato un NodePool, i nodi cancellati vengono riciclati dagli inserimenti successivi
     """
+    node_class = Node                                   # classe dei nodi creati dal dizionario
 
-    def __init__(self):
+    def __init__(self, pool=None, policy=None, indexed=False):
+        if policy not in POLICIES:
+            raise ValueError(f"Politica '{policy}' non valida, scegliere tra {POLICIES}.")
+        check_pool(pool, self.node_class)
         self.head = None                                # inizialmente la testa della lista è nulla
+        self.pool = pool
+        self.policy = policy
+        self._index = {} if indexed else None           # indice chiave -> nodo, se richiesto
+        self.count = 0                                  # numero di coppie memorizzate
+        self.moves = 0                                  # spostamenti fatti dalla politica (statistica)
+        self._version = 0                               # cambia a ogni modifica strutturale (per gli iteratori)
+        self._last_hot = None                           # FREQUENCY: ultimo nodo con almeno un accesso
 
-    def insert(self, key, value):
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return self.keys()
+
+    def keys(self):
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        for _, value in self.items():
+            yield value
+
+    def items(self):
         """
-        Inserisce o aggiorna una coppia chiave-valore nella lista
-        Se la chiave esiste già, il valore corrispondente viene aggiornato, sennò viene creato un nuovo nodo in testa
+        Generatore delle coppie (chiave, valore) dalla testa alla coda, con memoria extra O(1)
+        Se il dizionario viene modificato durante l'iterazione lancia RuntimeError, come i dict di Python;
+        con una politica attiva anche gli accessi che spostano nodi contano come modifiche
         """
+        version = self._version
         current = self.head
-        while current:                                  # scorro la lista finché non arrivo alla fine
+        while current:
+            if self._version != version:
+                raise RuntimeError("Il dizionario è stato modificato durante l'iterazione.")
+            yield current.key, current.value
+            current = current.next
+        if self._version != version:
+            raise RuntimeError("Il dizionario è stato modificato durante l'iterazione.")
+
+    def save(self, path):
+        """
+        Salva il dizionario su file (formato di data_structures.snapshot) nell'ordine della lista
+        """
+        write_records(path, self.items(), self.count)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """
+        Ricostruisce un dizionario salvato con save in O(n), leggendo il file in streaming e
+        ricollegando i nodi nello stesso ordine
+        """
+        count, records = read_records(path)
+        dict_instance = cls(**kwargs)
+        pool = dict_instance.pool
+        tail = None
+        for key, value in records:
+            node = pool.acquire(key, value) if pool is not None else dict_instance.node_class(key, value)
+            if tail is None:
+                dict_instance.head = node
+            else:
+                tail.next = node                        # aggiungo in coda per mantenere l'ordine salvato
+                node.prev = tail
+            tail = node
+            if dict_instance._index is not None:
+                dict_instance._index[key] = node
+        dict_instance.count = count
+        dict_instance._version += 1
+        return dict_instance
+
+    def _find(self, key):
+        """
+        Restituisce il nodo con la chiave data, None se non è presente
+        Con l'indice la ricerca è O(1), altrimenti scorro la lista dalla testa
+        """
+        if self._index is not None:
+            return self._index.get(key)
+
+        current = self.head
+        while current:
             if current.key == key:
-                current.value = value                   # aggiorna il valore se la chiave esiste già
-                return
+                return current
             current = current.next
+        return None
+
+    def _trace(self, key):
+        """
+        Percorso che una ricerca di key compie nella lista, per le statistiche (vedi data_structures.stats):
+        nodi visitati e confronti fino alla chiave (con l'indice al più un nodo) e lunghezza della lista
+        """
+        if self._index is not None:
+            visited = 1 if key in self._index else 0
+            return {'nodes_visited': visited, 'comparisons': visited, 'chain_length': self.count}
+
+        visited = 0
+        current = self.head
+        while current:
+            visited += 1
+            if current.key == key:
+                break
+            current = current.next
+        return {'nodes_visited': visited, 'comparisons': visited, 'chain_length': self.count}
+
+    def _link_front(self, node):
+        node.prev = None
+        node.next = self.head                           # il nuovo nodo punta alla vecchia testa
+        if self.head is not None:
+            self.head.prev = node
+        self.head = node
+
+    def _link_after(self, node, target):
+        if target is None:                              # None = in testa
+            self._link_front(node)
+            return
+        node.prev = target
+        node.next = target.next
+        if target.next is not None:
+            target.next.prev = node
+        target.next = node
 
-        new_node = Node(key, value)                     # crea un nuovo nodo se la chiave non esiste
-        new_node.next = self.head                       # inserisce il nuovo nodo in testa
-        self.head = new_node
+    def _unlink(self, node):
+        if node.prev is not None:                       # se il nodo non è la testa
+            node.prev.next = node.next                  # collego il precedente al next del nodo
+        else:                                           # se il nodo è la testa
+            self.head = node.next                       # aggiorno la testa al next del nodo
+        if node.next is not None:
+            node.next.prev = node.prev
+        node.prev = node.next = None
+
+    def _touch(self, node):
+        """
+        Applica la politica di auto-organizzazione al nodo appena trovato
+        Con FREQUENCY i nodi con almeno un accesso formano un prefisso della lista che termina in _last_hot: un nodo
+        al primo accesso va subito dopo _last_hot, gli altri scavalcano solo i nodi con meno accessi
+        """
+        if self.policy is None:
+            return
+
+        node.hits += 1
+        if self.policy == FREQUENCY:
+            if node.hits == 1:                          # primo accesso: diventa l'ultimo nodo del prefisso
+                target = self._last_hot
+                self._last_hot = node
+            else:                                       # scavalco i nodi con meno accessi
+                target = node.prev
+                while target is not None and target.hits < node.hits:
+                    target = target.prev
+                if target is not node.prev and node is self._last_hot:
+                    self._last_hot = node.prev          # il prefisso ora termina nel nodo che lo precedeva
+            if target is node.prev:                     # l'ordine per frequenza è già rispettato
+                return
+        elif node.prev is None:                         # è già in testa
+            return
+        elif self.policy == MOVE_TO_FRONT:
+            target = None                               # lo inserirò dopo target (None = in testa)
+        else:                                           # TRANSPOSE: scavalco solo il precedente
+            target = node.prev.prev
+
+        self._unlink(node)
+        self._link_after(node, target)
+        self.moves += 1
+        self._version += 1
+
+    def insert(self, key, value):
+        """
+        Inserisce o aggiorna una coppia chiave-valore nella lista
+        Se la chiave esiste già, il valore corrispondente viene aggiornato, sennò viene creato un nuovo nodo in testa
+        (con la politica FREQUENCY dopo i nodi già acceduti, così la lista resta ordinata per numero di accessi: O(1),
+        il confine tra nodi acceduti e non è tenuto in _last_hot)
+        """
+        node = self._find(key)
+        if node is not None:
+            node.value = value                          # aggiorna il valore se la chiave esiste già
+            self._touch(node)
+            return
+
+        # Crea un nuovo nodo (o ne ricicla uno dal pool) se la chiave non esiste e lo inserisce in testa
+        new_node = self.pool.acquire(key, value) if self.pool is not None else self.node_class(key, value)
+        if self.policy == FREQUENCY:
+            self._link_after(new_node, self._last_hot)
+        else:
+            self._link_front(new_node)
+        if self._index is not None:
+            self._index[key] = new_node
+        self.count += 1
+        self._version += 1
 
     def search(self, key):
         """
         Cerca un valore data una chiave
         Restituisce il valore se viene trovata la chiave, sennò lancia un'eccezione KeyError
         """
+        node = self._find(key)
+        if node is None:
+            raise KeyError(f"La Chiave '{key}' non è presente nel dizionario.")
+        self._touch(node)
+        return node.value
+
+    def search_many(self, keys, default=None):
+        """
+        Cerca una sequenza di chiavi con un'unica scansione della lista, O(n + m) invece di O(n * m)
+        Restituisce la lista dei valori (default per le chiavi assenti) e la maschera dei successi
+        """
+        keys = list(keys)
+        if self._index is not None:
+            nodes = [self._index.get(key) for key in keys]
+        else:
+            wanted = set(keys)
+            found = {}
+            current = self.head
+            while current and len(found) < len(wanted):     # mi fermo appena ho trovato tutte le chiavi cercate
+                if current.key in wanted:
+                    found[current.key] = current
+                current = current.next
+            nodes = [found.get(key) for key in keys]
+
+        for node in nodes:                              # la politica vede gli accessi nell'ordine delle chiavi
+            if node is not None:
+                self._touch(node)
+        hits = [node is not None for node in nodes]
+        values = [node.value if node is not None else default for node in nodes]
+        return values, hits
+
+    def contains_many(self, keys):
+        return self.search_many(keys)[1]
+
+    def delete_many(self, keys):
+        """
+        Cancella una sequenza di chiavi con un'unica scansione della lista, quelle mancanti vengono ignorate
+        Restituisce la maschera delle chiavi effettivamente cancellate (una chiave ripetuta conta una volta sola)
+        """
+        keys = list(keys)
+        if self._index is not None:
+            return [self._remove(self._index.get(key)) for key in keys]
+
+        wanted = set(keys)
+        deleted = set()
         current = self.head
-        while current:
-            if current.key == key:
-                return current.value
-            current = current.next
+        while current and len(deleted) < len(wanted):
+            next_node = current.next
+            if current.key in wanted:
+                deleted.add(current.key)
+                self._remove(current)
+            current = next_node
 
-        raise KeyError(f"La Chiave '{key}' non è presente nel dizionario.")
+        mask = []
+        for key in keys:
+            mask.append(key in deleted)
+            deleted.discard(key)                        # le ripetizioni successive risultano non cancellate
+        return mask
 
     def delete(self, key):
         """
         Cancella una coppia chiave-valore data una chiave
         Se non viene trovata, lancia un'eccezione KeyError
         """
-        current = self.head
-        previous = None
+        if not self._remove(self._find(key)):
+            raise KeyError(f"La Chiave '{key}' non è presente nel dizionario.")
 
-        while current:
-            if current.key == key:                      # entro nell'if se trovo il nodo da cancellare
-                if previous:                            # se la chiave da cancellare non è la testa
-                    previous.next = current.next        # collego il next precedente al next del nodo corrente
-                else:                                   # se la chiave da cancellare è la testa
-                    self.head = current.next            # aggiorno la testa al next del nodo corrente
-                return
-
-            previous = current                          # scorro la lista aggiornando previous e current
-            current = current.next
+    def _remove(self, node):
+        """
+        Stacca il nodo dalla lista (e dall'indice), restituisce False se node è None
+        """
+        if node is None:
+            return False
 
-        raise KeyError(f"La Chiave '{key}' non è presente nel dizionario.")
+        if node is self._last_hot:
+            self._last_hot = node.prev                  # il prefisso dei nodi acceduti si accorcia di uno
+        self._unlink(node)
+        if self._index is not None:
+            del self._index[node.key]
+        self.count -= 1
+        self._version += 1
+        if self.pool is not None:
+            self.pool.release(node)                     # restituisco il nodo al pool
+        return True
 
     def __str__(self):
-        elements = []
-        current = self.head
-        while current:
-            elements.append(f"[{current.key}: {current.value}]")
-            current = current.next
+        elements = [f"[{key}: {value}]" for key, value in self.items()]
         return "{ " + ", ".join(elements) + " }"
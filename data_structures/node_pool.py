@@ -0,0 +1,47 @@
+class NodePool:
+    """
+    Classe che rappresenta un pool di nodi riciclabili (free-list)
+    I dizionari che ricevono un pool gli restituiscono i nodi cancellati e li riprendono da lì quando inseriscono,
+    così nei carichi con molti inserimenti e cancellazioni non si alloca un oggetto nuovo per ogni chiave
+    Lo stesso pool può essere condiviso da più dizionari, purché usino la stessa classe di nodo
+    """
+    def __init__(self, node_class, max_size=4096):
+        self.node_class = node_class                    # classe dei nodi gestiti (es. abr_dict.Node)
+        self.max_size = max_size                        # oltre questo numero i nodi rilasciati vengono scartati
+        self._free = []
+        self.allocated = 0                              # nodi creati da zero (statistica)
+        self.reused = 0                                 # nodi ripresi dal pool (statistica)
+
+    def acquire(self, key, value):
+        """
+        Restituisce un nodo inizializzato con la coppia chiave-valore, riciclato se disponibile
+        """
+        if self._free:
+            node = self._free.pop()
+            node.__init__(key, value)                   # riporto il nodo allo stato iniziale
+            self.reused += 1
+            return node
+
+        self.allocated += 1
+        return self.node_class(key, value)
+
+    def release(self, node):
+        """
+        Restituisce un nodo non più usato al pool
+        """
+        if len(self._free) < self.max_size:
+            node.__init__(None, None)                   # azzero i riferimenti per non trattenere chiavi, valori e nodi
+            self._free.append(node)
+
+    def __len__(self):
+        return len(self._free)
+
+
+def check_pool(pool, node_class):
+    """
+    Controlla che un pool passato a un dizionario gestisca proprio la classe di nodi che il dizionario crea:
+    con un'altra classe l'errore emergerebbe solo più tardi, su un nodo già collegato alla struttura
+    """
+    if pool is not None and pool.node_class is not node_class:
+        raise ValueError(f"Il NodePool gestisce nodi {pool.node_class.__module__}.{pool.node_class.__qualname__}, "
+                         f"il dizionario usa {node_class.__module__}.{node_class.__qualname__}.")
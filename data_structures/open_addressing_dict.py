@@ -0,0 +1,226 @@
+from array import array
+
+from data_structures.snapshot import read_records, write_records
+
+EMPTY = 0                                                           # stato di uno slot mai usato
+OCCUPIED = 1                                                        # stato di uno slot con una coppia
+DELETED = 2                                                         # stato di uno slot cancellato (tombstone)
+MAX_LOAD_FACTOR = 0.7                                               # slot occupati + tombstone oltre cui ricostruisco
+MIN_LOAD_FACTOR = 0.1                                               # sotto questo carico la tabella si restringe
+FIBONACCI_MULTIPLIER = 11400714819323198485                         # 2^64 / sezione aurea
+MASK_64 = (1 << 64) - 1
+MIN_KEY = -(1 << 63)                                                # intervallo delle chiavi (array 'q')
+MAX_KEY = (1 << 63) - 1
+
+
+def _half_load_bits(count):
+    """
+    Bit della più piccola capacità (potenza di 2) in cui count coppie occupano al massimo metà del carico massimo
+    """
+    return (max(1, int(count / (MAX_LOAD_FACTOR / 2))) - 1).bit_length()
+
+
+class OpenAddressingDict:
+    """
+    Classe che rappresenta un dizionario basato su tabelle hash a indirizzamento aperto (scansione lineare)
+    Non esistono nodi: stato, chiave e valore di ogni slot sono memorizzati in tre array paralleli, gli stati in un array
+    di byte, le chiavi intere in un array compatto di interi a 64 bit, i valori in una lista Python
+    Con int_keys=False le chiavi possono essere di qualunque tipo hashable e stanno in una lista (lo slot iniziale
+    deriva da hash()): si perde la compattezza delle chiavi, non quella degli stati
+    Le cancellazioni lasciano una tombstone nello slot, così le sequenze di scansione restano integre
+    """
+    def __init__(self, capacity=16, int_keys=True):
+        """
+        La capacità viene arrotondata alla potenza di 2 successiva, così l'indice si calcola con una maschera
+        """
+        bits = max(3, (capacity - 1).bit_length())
+        self.int_keys = int_keys
+        self.count = 0                                              # numero di coppie memorizzate
+        self._version = 0                                           # cambia a ogni modifica strutturale
+        self.min_capacity = 1 << bits
+        self._allocate(bits)
+
+    def _allocate(self, bits):
+        self.capacity = 1 << bits
+        self._bits = bits
+        self._mask = self.capacity - 1
+        self._used = 0                                              # slot non vuoti (occupati o tombstone)
+        self._states = array('b', [EMPTY]) * self.capacity          # un byte di stato per slot
+        if self.int_keys:
+            self._keys = array('q', [0]) * self.capacity
+        else:
+            self._keys = [None] * self.capacity
+        self._values = [None] * self.capacity
+
+    def _slot(self, key):
+        if self.int_keys:
+            if not isinstance(key, int):                            # mi assicuro che la chiave sia un intero
+                raise TypeError("La chiave deve essere un intero.")
+            if not MIN_KEY <= key <= MAX_KEY:                       # deve stare nell'array compatto delle chiavi
+                raise OverflowError("La chiave deve essere un intero con segno a 64 bit.")
+        else:
+            key = hash(key)                                         # chiavi generiche: parto dal codice di hash()
+        # Hashing di Fibonacci: i bit alti del prodotto sparpagliano anche chiavi sequenziali o a passo costante
+        return ((key * FIBONACCI_MULTIPLIER) & MASK_64) >> (64 - self._bits)
+
+    def _find(self, key):
+        """
+        Scansione lineare a partire dallo slot iniziale della chiave
+        Restituisce (indice della chiave oppure -1, primo slot libero utilizzabile per inserirla)
+        """
+        states = self._states
+        keys = self._keys
+        index = self._slot(key)
+        first_free = -1
+        while True:
+            state = states[index]
+            if state == EMPTY:                                      # fine della sequenza: la chiave non c'è
+                return -1, (index if first_free < 0 else first_free)
+            if state == DELETED:
+                if first_free < 0:
+                    first_free = index                              # riuso la prima tombstone incontrata
+            elif keys[index] == key:                                # slot occupato
+                return index, index
+            index = (index + 1) & self._mask
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return self.keys()
+
+    def keys(self):
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        for _, value in self.items():
+            yield value
+
+    def items(self):
+        """
+        Generatore delle coppie (chiave, valore) nell'ordine degli slot
+        Se il dizionario viene modificato durante l'iterazione lancia RuntimeError, come i dict di Python
+        """
+        version = self._version
+        for index in range(self.capacity):
+            if self._version != version:
+                raise RuntimeError("Il dizionario è stato modificato durante l'iterazione.")
+            if self._states[index] == OCCUPIED:
+                yield self._keys[index], self._values[index]
+        if self._version != version:
+            raise RuntimeError("Il dizionario è stato modificato durante l'iterazione.")
+
+    def save(self, path):
+        """
+        Salva il dizionario su file (formato di data_structures.snapshot)
+        """
+        write_records(path, self.items(), self.count)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """
+        Ricostruisce un dizionario salvato con save, leggendo il file in streaming
+        Le coppie arrivano nell'ordine degli slot: alloco subito una tabella abbastanza grande, altrimenti
+        riversarle in una tabella più piccola creerebbe lunghe sequenze di slot occupati consecutivi
+        """
+        count, records = read_records(path)
+        dict_instance = cls(**kwargs)
+        bits = _half_load_bits(count)
+        if bits > dict_instance._bits:
+            dict_instance._allocate(bits)
+        for key, value in records:
+            dict_instance.insert(key, value)
+        return dict_instance
+
+    def load_factor(self):
+        return self.count / self.capacity
+
+    def insert(self, key, value):
+        index, free = self._find(key)
+        if index >= 0:
+            self._values[index] = value                             # aggiorno il valore se la chiave esiste già
+            return
+
+        if self._states[free] == EMPTY:
+            if self._used + 1 > MAX_LOAD_FACTOR * self.capacity:    # troppi slot usati: ricostruisco la tabella
+                self._rebuild()
+                index, free = self._find(key)
+            self._used += 1
+
+        self._states[free] = OCCUPIED
+        self._keys[free] = key
+        self._values[free] = value
+        self.count += 1
+        self._version += 1
+
+    def search(self, key):
+        index, _ = self._find(key)
+        if index < 0:                                               # se non trovo la chiave lancio eccezione
+            raise KeyError(f"La chiave '{key}' non è presente nel dizionario.")
+        return self._values[index]
+
+    def search_many(self, keys, default=None):
+        """
+        Cerca una sequenza di chiavi senza lanciare eccezioni per quelle mancanti
+        Restituisce la lista dei valori (default per le chiavi assenti) e la maschera dei successi
+        """
+        values = []
+        hits = []
+        for key in keys:
+            index, _ = self._find(key)
+            hits.append(index >= 0)
+            values.append(self._values[index] if index >= 0 else default)
+        return values, hits
+
+    def contains_many(self, keys):
+        return [self._find(key)[0] >= 0 for key in keys]
+
+    def delete_many(self, keys):
+        """
+        Cancella una sequenza di chiavi, quelle mancanti vengono ignorate
+        Restituisce la maschera delle chiavi effettivamente cancellate
+        """
+        return [self._remove(key) for key in keys]
+
+    def delete(self, key):
+        if not self._remove(key):
+            raise KeyError(f"Impossibile cancellare: la chiave '{key}' non è presente.")
+
+    def _remove(self, key):
+        index, _ = self._find(key)
+        if index < 0:
+            return False
+
+        self._states[index] = DELETED                               # lascio una tombstone
+        self._values[index] = None                                  # rilascio il riferimento al valore
+        if not self.int_keys:
+            self._keys[index] = None                                # e alla chiave
+        self.count -= 1
+        self._version += 1
+
+        if self.capacity > self.min_capacity and self.count < MIN_LOAD_FACTOR * self.capacity:
+            self._rebuild()
+        return True
+
+    def _rebuild(self):
+        """
+        Ricostruisce la tabella eliminando le tombstone; la capacità è scelta in modo che dopo la ricostruzione
+        il carico sia circa la metà del massimo
+        """
+        old_states, old_keys, old_values = self._states, self._keys, self._values
+        bits = max(self.min_capacity.bit_length() - 1, _half_load_bits(self.count))
+        self._allocate(bits)
+
+        for i, state in enumerate(old_states):
+            if state == OCCUPIED:
+                key = old_keys[i]
+                _, free = self._find(key)
+                self._states[free] = OCCUPIED
+                self._keys[free] = key
+                self._values[free] = old_values[i]
+                self._used += 1
+
+    def __str__(self):
+        elements = [f"[{key}: {value}]" for key, value in self.items()]
+        return "{ " + ", ".join(elements) + " }"
@@ -0,0 +1,243 @@
+import mmap
+import pickle
+import struct
+from hashlib import blake2b
+from multiprocessing import resource_tracker, shared_memory
+
+MAGIC = b'DICTSHT1'                                                 # identifica il layout (e la sua versione)
+HEADER = struct.Struct('<8sQQQ')                                    # magic, numero di slot, coppie, byte dell'arena
+SLOT = struct.Struct('<QQQ')                                        # codice hash (0 = vuoto), offset e lunghezza
+MAX_LOAD_FACTOR = 0.5                                               # tabella in sola lettura: posso tenerla rada
+FIBONACCI_MULTIPLIER = 11400714819323198485                         # 2^64 / sezione aurea
+MASK_64 = (1 << 64) - 1
+
+
+def stable_hash(key):
+    """
+    Hash a 64 bit che non dipende dal processo, così tutti i processi trovano la chiave nello stesso slot
+    hash() non va bene per stringhe e bytes (ha un seme casuale per processo): per queste chiavi, per i float
+    e per le tuple composte da chiavi supportate uso BLAKE2b senza chiave
+    """
+    if isinstance(key, float) and key.is_integer():
+        key = int(key)                                              # 1.0 == 1: stesso slot
+    if isinstance(key, int):
+        return (key * FIBONACCI_MULTIPLIER) & MASK_64
+    if isinstance(key, str):
+        data = b's' + key.encode('utf-8', 'surrogatepass')
+    elif isinstance(key, (bytes, bytearray)):
+        data = b'b' + bytes(key)
+    elif isinstance(key, float):
+        data = b'f' + struct.pack('<d', key)
+    elif isinstance(key, tuple):
+        data = b't' + b''.join(stable_hash(item).to_bytes(8, 'little') for item in key)
+    else:
+        raise TypeError("La chiave deve essere un numero, una stringa, bytes o una tupla di questi tipi.")
+    return int.from_bytes(blake2b(data, digest_size=8).digest(), 'little')
+
+
+def _capacity_bits(count):
+    return max(3, (int(count / MAX_LOAD_FACTOR) or 1).bit_length())
+
+
+def _place(slots, bits, key, offset, length):
+    """
+    Scrive nell'array degli slot la posizione nell'arena della coppia con la chiave data (scansione lineare)
+    """
+    code = stable_hash(key)
+    index = code >> (64 - bits)                                     # bit alti dell'hash di Fibonacci
+    while SLOT.unpack_from(slots, index * SLOT.size)[0] != 0:
+        index = (index + 1) & ((1 << bits) - 1)
+    SLOT.pack_into(slots, index * SLOT.size, (code >> 1) + 1, offset, length)
+
+
+def encode_table(items):
+    """
+    Prepara il layout binario della tabella a partire da una sequenza di coppie chiave-valore
+    (a parità di chiave vince l'ultima coppia)
+    Restituisce le tre parti da scrivere una dopo l'altra: header, array degli slot e lista delle coppie serializzate
+    che formano l'arena; la tabella usa l'indirizzamento aperto con scansione lineare
+    """
+    latest = {}
+    for key, value in items:
+        stable_hash(key)                                            # controllo subito il tipo della chiave
+        latest[key] = value
+
+    bits = _capacity_bits(len(latest))
+    slots = bytearray((1 << bits) * SLOT.size)
+    blobs = []
+    offset = 0
+    for key, value in latest.items():
+        blob = pickle.dumps((key, value), protocol=pickle.HIGHEST_PROTOCOL)
+        _place(slots, bits, key, offset, len(blob))
+        blobs.append(blob)
+        offset += len(blob)
+
+    header = HEADER.pack(MAGIC, 1 << bits, len(latest), offset)
+    return header, slots, blobs
+
+
+def write_table(file, items, count):
+    """
+    Scrive la tabella in un file binario aperto in scrittura, con lo stesso layout usato in memoria condivisa
+    Le count coppie (con chiavi distinte) vengono serializzate e scritte nell'arena man mano che arrivano;
+    header e slot, che dipendono dalle posizioni nell'arena, vengono scritti alla fine tornando all'inizio del file
+    """
+    bits = _capacity_bits(count)
+    slots = bytearray((1 << bits) * SLOT.size)
+    start = file.tell()
+    file.seek(start + HEADER.size + len(slots))                     # lascio spazio per header e slot
+
+    offset = 0
+    written = 0
+    for key, value in items:
+        blob = pickle.dumps((key, value), protocol=pickle.HIGHEST_PROTOCOL)
+        _place(slots, bits, key, offset, len(blob))
+        file.write(blob)
+        offset += len(blob)
+        written += 1
+    if written != count:
+        raise RuntimeError(f"Attese {count} coppie da salvare, scritte {written}.")
+
+    end = file.tell()
+    file.seek(start)
+    file.write(HEADER.pack(MAGIC, 1 << bits, count, offset))
+    file.write(slots)
+    file.seek(end)
+
+
+class SharedHashTable:
+    """
+    Classe che rappresenta un dizionario in sola lettura memorizzato in un'unica regione di memoria con layout
+    binario fisso: header, array di slot e arena con le coppie chiave-valore serializzate
+    La regione può essere una SharedMemory (create / attach) o un qualunque buffer, per esempio un file mappato
+    con mmap: i processi che si collegano non copiano né deserializzano la tabella, search legge direttamente
+    lo slot e deserializza solo la coppia trovata
+    """
+    def __init__(self, buffer, shm=None, mapping=None):
+        self._buffer = memoryview(buffer)
+        magic, self.capacity, self.count, self.arena_size = HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            self._buffer.release()
+            raise ValueError("Il buffer non contiene una tabella hash condivisa.")
+        self._bits = self.capacity.bit_length() - 1
+        self._arena = HEADER.size + self.capacity * SLOT.size       # inizio dell'arena nel buffer
+        self._shm = shm                                             # regione di memoria condivisa, se presente
+        self._mapping = mapping                                     # file mappato in memoria, se presente
+
+    @classmethod
+    def create(cls, items, name=None):
+        """
+        Crea una nuova regione di memoria condivisa con le coppie date e la restituisce già collegata
+        Il creatore è responsabile di chiamare unlink quando la tabella non serve più
+        """
+        header, slots, blobs = encode_table(items)
+        size = len(header) + len(slots) + sum(len(blob) for blob in blobs)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        buffer = shm.buf
+        buffer[:len(header)] = header
+        position = len(header)
+        buffer[position:position + len(slots)] = slots
+        position += len(slots)
+        for blob in blobs:
+            buffer[position:position + len(blob)] = blob
+            position += len(blob)
+        return cls(shm.buf, shm)
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Si collega a una tabella già creata (anche da un altro processo) senza copiarla
+        """
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)    # Python 3.13+: solo il creatore la traccia
+        except TypeError:
+            # Prima della 3.13 anche chi si collega registra la regione nel resource tracker: se il tracker è nuovo
+            # (processo non figlio del creatore) la distruggerebbe all'uscita del processo, quindi la deregistro
+            tracker_was_running = getattr(resource_tracker._resource_tracker, '_fd', None) is not None
+            shm = shared_memory.SharedMemory(name=name)
+            if not tracker_was_running:
+                resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(shm.buf, shm)
+
+    @classmethod
+    def open_file(cls, path):
+        """
+        Mappa in memoria (in sola lettura) una tabella salvata su file con write_table, per esempio da
+        HashTableDict.save: le pagine vengono lette dal disco solo quando servono
+        """
+        with open(path, 'rb') as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapping, mapping=mapping)
+
+    @property
+    def name(self):
+        return self._shm.name if self._shm is not None else None
+
+    @property
+    def nbytes(self):
+        return HEADER.size + self.capacity * SLOT.size + self.arena_size        # dimensione dell'intera tabella
+
+    def search(self, key):
+        code = stable_hash(key)
+        index = code >> (64 - self._bits)
+        code = (code >> 1) + 1
+        buffer = self._buffer
+        while True:
+            slot_code, offset, length = SLOT.unpack_from(buffer, HEADER.size + index * SLOT.size)
+            if slot_code == 0:                                      # slot vuoto: la chiave non c'è
+                raise KeyError(f"La chiave '{key}' non è presente nel dizionario.")
+            if slot_code == code:                                   # stesso hash: deserializzo solo questa coppia
+                start = self._arena + offset
+                entry_key, value = pickle.loads(buffer[start:start + length])
+                if entry_key == key:
+                    return value
+            index = (index + 1) & (self.capacity - 1)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return self.keys()
+
+    def keys(self):
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        for _, value in self.items():
+            yield value
+
+    def items(self):
+        for index in range(self.capacity):
+            slot_code, offset, length = SLOT.unpack_from(self._buffer, HEADER.size + index * SLOT.size)
+            if slot_code != 0:
+                start = self._arena + offset
+                yield pickle.loads(self._buffer[start:start + length])
+
+    def close(self):
+        """
+        Scollega questo processo dalla regione di memoria (la regione resta disponibile agli altri)
+        """
+        self._buffer.release()
+        if self._shm is not None:
+            self._shm.close()
+        if self._mapping is not None:
+            self._mapping.close()
+
+    def unlink(self):
+        """
+        Distrugge la regione di memoria condivisa, da chiamare una sola volta (di solito dal creatore)
+        """
+        if self._shm is not None:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __str__(self):
+        elements = [f"[{key}: {value}]" for key, value in self.items()]
+        return "{ " + ", ".join(elements) + " }"
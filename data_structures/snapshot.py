@@ -0,0 +1,45 @@
+import pickle
+import struct
+
+MAGIC = b'DICTSNP1'                                                 # identifica il formato (e la sua versione)
+HEADER = struct.Struct('<8sQ')                                      # magic, numero di coppie
+LENGTH = struct.Struct('<I')                                        # lunghezza di ogni coppia serializzata
+
+
+def write_records(path, items, count):
+    """
+    Salva count coppie chiave-valore in un file binario: header seguito dalle coppie serializzate una per una,
+    ognuna preceduta dalla propria lunghezza
+    Le coppie vengono scritte man mano che l'iteratore le produce, senza costruire copie intermedie
+    """
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, count))
+        written = 0
+        for item in items:
+            blob = pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+            file.write(LENGTH.pack(len(blob)))
+            file.write(blob)
+            written += 1
+
+    if written != count:
+        raise RuntimeError(f"Attese {count} coppie da salvare, scritte {written}.")
+
+
+def read_records(path):
+    """
+    Apre un file salvato con write_records e restituisce il numero di coppie e un generatore che le legge
+    dal file una alla volta (in memoria c'è solo la coppia corrente)
+    """
+    file = open(path, 'rb')
+    magic, count = HEADER.unpack(file.read(HEADER.size))
+    if magic != MAGIC:
+        file.close()
+        raise ValueError(f"Il file '{path}' non è uno snapshot di un dizionario.")
+    return count, _iter_records(file, count)
+
+
+def _iter_records(file, count):
+    with file:
+        for _ in range(count):
+            (length,) = LENGTH.unpack(file.read(LENGTH.size))
+            yield pickle.loads(file.read(length))
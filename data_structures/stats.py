@@ -0,0 +1,168 @@
+import gc
+import time
+import weakref
+
+OPERATIONS = ('insert', 'search', 'delete')                         # operazioni strumentate
+_recorders = weakref.WeakSet()                                      # recorder attivi che contano le raccolte del gc
+
+
+class Histogram:
+    """
+    Classe che rappresenta l'istogramma dei valori interi di una metrica (valore -> numero di occorrenze)
+    """
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        self.counts[value] = self.counts.get(value, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        """
+        Il più piccolo valore registrato che copre almeno fraction delle occorrenze (0 se l'istogramma è vuoto)
+        """
+        needed = fraction * self.count
+        seen = 0
+        for value in sorted(self.counts):
+            seen += self.counts[value]
+            if seen >= needed:
+                return value
+        return 0
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.percentile(0.5),
+            'p99': self.percentile(0.99),
+            'max': self.max,
+            'histogram': dict(sorted(self.counts.items()))
+        }
+
+
+class StatsRecorder:
+    """
+    Classe che raccoglie le statistiche delle operazioni di un dizionario: per ogni operazione un istogramma per ogni
+    metrica (quelle restituite dal _trace del dizionario, più le allocazioni di nodi e la latenza)
+    La latenza è in nanosecondi, raggruppata in potenze di 2 (il valore registrato è il limite inferiore
+    dell'intervallo) per tenere l'istogramma piccolo; le raccolte del garbage collector vengono contate a parte
+    """
+    def __init__(self):
+        self.operations = {operation: {} for operation in OPERATIONS}
+        self.gc_collections = 0
+        self.misses = {operation: 0 for operation in OPERATIONS}     # ricerche e cancellazioni di chiavi assenti
+
+    def record(self, operation, metrics):
+        histograms = self.operations[operation]
+        for metric, value in metrics.items():
+            histogram = histograms.get(metric)
+            if histogram is None:
+                histogram = histograms[metric] = Histogram()
+            histogram.add(value)
+
+    def histogram(self, operation, metric):
+        return self.operations[operation][metric]
+
+    def snapshot(self):
+        """
+        Esporta le statistiche come dizionari e liste di Python (serializzabili in JSON)
+        """
+        return {
+            'operations': {
+                operation: {
+                    'count': histograms['latency_ns'].count if histograms else 0,
+                    'misses': self.misses[operation],
+                    'metrics': {metric: histogram.snapshot() for metric, histogram in histograms.items()}
+                }
+                for operation, histograms in self.operations.items()
+            },
+            'gc_collections': self.gc_collections
+        }
+
+    def reset(self):
+        self.__init__()
+
+
+def _instrument(dict_instance, recorder, operation):
+    """
+    Crea il sostituto di un'operazione: misura il percorso con _trace prima di eseguirla, poi conta nodi allocati
+    (dal pool, se presente, altrimenti dalla crescita del dizionario) e latenza
+    """
+    method = getattr(dict_instance, operation)
+    trace = dict_instance._trace
+    pool = getattr(dict_instance, 'pool', None)
+
+    def instrumented(key, *args):
+        metrics = trace(key)
+        size = len(dict_instance)
+        allocated = pool.allocated if pool is not None else 0
+        start = time.perf_counter_ns()
+        try:
+            return method(key, *args)
+        except KeyError:
+            recorder.misses[operation] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            if pool is not None:
+                metrics['allocations'] = pool.allocated - allocated
+            else:
+                metrics['allocations'] = max(0, len(dict_instance) - size)
+            metrics['latency_ns'] = 1 << (elapsed.bit_length() - 1) if elapsed else 0
+            recorder.record(operation, metrics)
+
+    return instrumented
+
+
+def _gc_callback(phase, info):
+    """
+    Unica callback registrata in gc.callbacks per tutto il processo: conta la raccolta su ogni recorder attivo
+    I recorder sono tenuti con riferimenti deboli, così un dizionario abbandonato senza disable_stats non resta vivo
+    """
+    if phase == 'start':
+        for recorder in _recorders:
+            recorder.gc_collections += 1
+
+
+def enable_stats(dict_instance):
+    """
+    Attiva le statistiche su un dizionario (ABRDict, AVLDict, BTreeDict, HashTableDict, LinkedListDict) e restituisce il
+    StatsRecorder che le raccoglie
+    insert, search e delete vengono sostituiti solo su questa istanza da versioni strumentate: la classe e le altre
+    istanze restano intatte, quindi a statistiche disattivate il costo è nullo
+    """
+    if getattr(dict_instance, '_stats', None) is not None:
+        return dict_instance._stats
+
+    recorder = StatsRecorder()
+    for operation in OPERATIONS:
+        setattr(dict_instance, operation, _instrument(dict_instance, recorder, operation))
+    if _gc_callback not in gc.callbacks:                            # registro la callback al primo utilizzo
+        gc.callbacks.append(_gc_callback)
+    _recorders.add(recorder)
+    dict_instance._stats = recorder
+    return recorder
+
+
+def disable_stats(dict_instance):
+    """
+    Ripristina le operazioni originali e restituisce il StatsRecorder con le statistiche raccolte fin qui
+    """
+    recorder = getattr(dict_instance, '_stats', None)
+    if recorder is None:
+        return None
+
+    for operation in OPERATIONS:
+        delattr(dict_instance, operation)                           # torna visibile il metodo della classe
+    _recorders.discard(recorder)
+    dict_instance._stats = None
+    return recorder
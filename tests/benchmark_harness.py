@@ -0,0 +1,348 @@
+"""
+Benchmark ripetibile dei dizionari, pensato per confrontare versioni diverse del codice
+
+Per ogni struttura, dimensione e operazione:
+- i carichi sono generati da un seme fisso, quindi due esecuzioni misurano esattamente le stesse chiavi
+- prima delle misure ci sono alcune esecuzioni di riscaldamento, poi repeats esecuzioni misurate; ogni misura
+  ripete l'operazione quante volte serve per durare almeno --min-time secondi (stimato durante il riscaldamento),
+  così anche le misure sulle dimensioni piccole non sono dominate dalla risoluzione del timer e dal rumore
+- durante ogni misura il garbage collector è disattivato (e viene eseguito prima, fuori dalla misura)
+- di ogni operazione riporto il tempo per operazione (mediana, p95, p99, media, deviazione standard e intervallo di
+  confidenza al 95% della mediana, con il bootstrap) e la distribuzione delle latenze delle singole operazioni
+- le strutture asintoticamente senza speranza (liste e ABR con chiavi ordinate) vengono saltate oltre una soglia
+
+I risultati vengono salvati in JSON; con --compare li confronto con quelli di un'esecuzione precedente e segnalo
+le regressioni (mediana peggiorata oltre la soglia e intervalli di confidenza disgiunti), uscendo con codice 1
+
+Esempi:
+    python tests/benchmark_harness.py --sizes 1000 100000 --output risultati.json
+    python tests/benchmark_harness.py --output nuovi.json --compare risultati.json
+    python tests/benchmark_harness.py --current nuovi.json --compare risultati.json
+"""
+import argparse, gc, json, math, os, platform, random, statistics, sys, time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from data_structures.abr_dict import ABRDict
+from data_structures.avl_dict import AVLDict
+from data_structures.btree_dict import BTreeDict
+from data_structures.hash_table_dict import HashTableDict
+from data_structures.linked_list_dict import LinkedListDict
+from data_structures.open_addressing_dict import OpenAddressingDict
+
+# Strutture misurate e dimensione massima per ordine delle chiavi (None = nessun limite)
+STRUCTURES = {
+    'linked_list': (LinkedListDict, {'random': 10 ** 4, 'sorted': 10 ** 4}),
+    'abr': (ABRDict, {'random': None, 'sorted': 10 ** 4}),
+    'avl': (AVLDict, {'random': None, 'sorted': None}),
+    'btree': (BTreeDict, {'random': None, 'sorted': None}),
+    'hash': (HashTableDict, {'random': None, 'sorted': None}),
+    'open_addressing': (OpenAddressingDict, {'random': None, 'sorted': None})
+}
+OPERATIONS = ('insert', 'search_hit', 'search_miss', 'delete', 'iterate')
+DEFAULT_SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)
+MAX_OPS = 100000                                                    # operazioni misurate per ricerche e cancellazioni
+LATENCY_SAMPLES = 10000                                             # operazioni cronometrate una per una
+BOOTSTRAP_RESAMPLES = 2000
+
+
+def make_workload(size, order, seed):
+    """
+    Chiavi da inserire, da cercare (presenti e assenti) e da cancellare, generate in modo deterministico dal seme
+    """
+    rng = random.Random(f"{seed}-{size}-{order}")
+    if order == 'sorted':
+        keys = list(range(size))
+    else:
+        keys = rng.sample(range(size * 10), size)
+    ops = min(size, MAX_OPS)
+    hits = [keys[rng.randrange(size)] for _ in range(ops)]
+    misses = [size * 10 + rng.randrange(size * 10) for _ in range(ops)]    # fuori dall'intervallo delle chiavi
+    deletes = rng.sample(keys, ops)
+    return {'keys': keys, 'hits': hits, 'misses': misses, 'deletes': deletes}
+
+
+def _build(dict_class, keys):
+    dict_instance = dict_class()
+    for key in keys:
+        dict_instance.insert(key, key)
+    return dict_instance
+
+
+def _timed(function):
+    """
+    Esegue function con il garbage collector disattivato e restituisce la durata in nanosecondi
+    """
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter_ns()
+        function()
+        return time.perf_counter_ns() - start
+    finally:
+        gc.enable()
+
+
+def _search_all(dict_instance, keys):
+    search = dict_instance.search
+    for key in keys:
+        try:
+            search(key)
+        except KeyError:
+            pass
+
+
+def run_once(dict_class, operation, workload, populated):
+    """
+    Una misura: restituisce il numero di operazioni e la durata totale in nanosecondi
+    populated è un dizionario già caricato, riusato dalle operazioni che lo lasciano invariato
+    """
+    keys = workload['keys']
+    if operation == 'insert':
+        return len(keys), _timed(lambda: _build(dict_class, keys))
+    if operation == 'search_hit':
+        return len(workload['hits']), _timed(lambda: _search_all(populated, workload['hits']))
+    if operation == 'search_miss':
+        return len(workload['misses']), _timed(lambda: _search_all(populated, workload['misses']))
+    if operation == 'iterate':
+        return len(keys), _timed(lambda: [None for _ in populated.items()])
+
+    # Cancellazione: misuro solo le delete, poi reinserisco le chiavi (fuori dalla misura) per la prossima ripetizione
+    deletes = workload['deletes']
+
+    def delete_all():
+        delete = populated.delete
+        for key in deletes:
+            delete(key)
+    elapsed = _timed(delete_all)
+    for key in deletes:
+        populated.insert(key, key)
+    return len(deletes), elapsed
+
+
+def sample_latencies(dict_class, operation, workload, populated):
+    """
+    Latenze in nanosecondi di singole operazioni (fino a LATENCY_SAMPLES), per la distribuzione delle code
+    """
+    clock = time.perf_counter_ns
+    latencies = []
+    gc.collect()
+    gc.disable()
+    try:
+        if operation == 'insert':
+            dict_instance = dict_class()
+            for key in workload['keys'][:LATENCY_SAMPLES]:
+                start = clock()
+                dict_instance.insert(key, key)
+                latencies.append(clock() - start)
+        elif operation in ('search_hit', 'search_miss'):
+            for key in workload['hits' if operation == 'search_hit' else 'misses'][:LATENCY_SAMPLES]:
+                start = clock()
+                try:
+                    populated.search(key)
+                except KeyError:
+                    pass
+                latencies.append(clock() - start)
+        elif operation == 'delete':
+            deletes = workload['deletes'][:LATENCY_SAMPLES]
+            for key in deletes:
+                start = clock()
+                populated.delete(key)
+                latencies.append(clock() - start)
+            for key in deletes:
+                populated.insert(key, key)
+        else:                                                       # iterate: tempo per ogni elemento prodotto
+            iterator = populated.items()
+            for _ in range(min(LATENCY_SAMPLES, len(populated))):
+                start = clock()
+                next(iterator)
+                latencies.append(clock() - start)
+    finally:
+        gc.enable()
+    return latencies
+
+
+def percentile(values, fraction):
+    """
+    Percentile con interpolazione lineare tra i due valori più vicini (values già ordinati)
+    """
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def bootstrap_median_ci(values, rng, confidence=0.95):
+    """
+    Intervallo di confidenza della mediana con il bootstrap percentile
+    """
+    if len(values) < 2:
+        return [values[0], values[0]] if values else [0.0, 0.0]
+    medians = sorted(statistics.median(rng.choices(values, k=len(values))) for _ in range(BOOTSTRAP_RESAMPLES))
+    tail = (1 - confidence) / 2
+    return [percentile(medians, tail), percentile(medians, 1 - tail)]
+
+
+def summarize(samples, rng):
+    ordered = sorted(samples)
+    return {
+        'median': statistics.median(ordered),
+        'p95': percentile(ordered, 0.95),
+        'p99': percentile(ordered, 0.99),
+        'mean': statistics.fmean(ordered),
+        'stdev': statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        'ci95': bootstrap_median_ci(ordered, rng),
+        'samples': samples
+    }
+
+
+def summarize_latencies(latencies):
+    ordered = sorted(latencies)
+    return {
+        'count': len(ordered),
+        'p50': percentile(ordered, 0.5),
+        'p95': percentile(ordered, 0.95),
+        'p99': percentile(ordered, 0.99),
+        'p999': percentile(ordered, 0.999),
+        'max': ordered[-1] if ordered else 0
+    }
+
+
+def run_benchmark(structures, sizes, orders, operations, repeats, warmup, seed, min_time=0.05, progress=print):
+    rng = random.Random(seed)                                       # per il bootstrap
+    results = []
+    for order in orders:
+        for size in sizes:
+            workload = make_workload(size, order, seed)
+            for name in structures:
+                dict_class, limits = STRUCTURES[name]
+                if limits[order] is not None and size > limits[order]:
+                    progress(f"  {name:<16} {order:<7} N = {size:<9} saltato (oltre {limits[order]})")
+                    continue
+
+                populated = _build(dict_class, workload['keys'])
+                for operation in operations:
+                    elapsed = 0
+                    for _ in range(max(1, warmup)):                 # serve almeno una esecuzione per la stima
+                        ops, elapsed = run_once(dict_class, operation, workload, populated)
+                    rounds = max(1, math.ceil(min_time * 1e9 / max(elapsed, 1)))
+                    samples = []
+                    for _ in range(repeats):
+                        total = 0
+                        for _ in range(rounds):
+                            ops, elapsed = run_once(dict_class, operation, workload, populated)
+                            total += elapsed
+                        samples.append(total / (ops * rounds))
+                    latencies = sample_latencies(dict_class, operation, workload, populated)
+
+                    result = {
+                        'structure': name,
+                        'size': size,
+                        'order': order,
+                        'operation': operation,
+                        'ops': ops,
+                        'rounds': rounds,
+                        'ns_per_op': summarize(samples, rng),
+                        'latency_ns': summarize_latencies(latencies)
+                    }
+                    results.append(result)
+                    summary = result['ns_per_op']
+                    progress(f"  {name:<16} {order:<7} N = {size:<9} {operation:<12} "
+                             f"mediana {summary['median']:>10.1f} ns/op  "
+                             f"IC95 [{summary['ci95'][0]:.1f}, {summary['ci95'][1]:.1f}]  "
+                             f"p99 latenza {result['latency_ns']['p99']:.0f} ns")
+                del populated
+    return results
+
+
+def _result_key(result):
+    return result['structure'], result['size'], result['order'], result['operation']
+
+
+def compare(current, baseline, threshold):
+    """
+    Confronta due esecuzioni e restituisce le righe del confronto; una riga è una regressione se la mediana è peggiorata
+    più di threshold e l'intervallo di confidenza attuale è tutto sopra quello di riferimento
+    """
+    reference = {_result_key(result): result for result in baseline['results']}
+    rows = []
+    for result in current['results']:
+        previous = reference.get(_result_key(result))
+        if previous is None:
+            continue
+        now, before = result['ns_per_op'], previous['ns_per_op']
+        change = now['median'] / before['median'] - 1 if before['median'] else 0.0
+        rows.append({
+            'key': _result_key(result),
+            'baseline': before['median'],
+            'current': now['median'],
+            'change': change,
+            'regression': change > threshold and now['ci95'][0] > before['ci95'][1],
+            'improvement': change < -threshold and now['ci95'][1] < before['ci95'][0]
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ripetibile dei dizionari")
+    parser.add_argument('--structures', nargs='+', choices=tuple(STRUCTURES), default=tuple(STRUCTURES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES)
+    parser.add_argument('--orders', nargs='+', choices=('random', 'sorted'), default=('random', 'sorted'))
+    parser.add_argument('--operations', nargs='+', choices=OPERATIONS, default=OPERATIONS)
+    parser.add_argument('--repeats', type=int, default=7)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=12345)
+    parser.add_argument('--min-time', type=float, default=0.05, help="durata minima in secondi di ogni misura")
+    parser.add_argument('--output', help="file JSON in cui salvare i risultati")
+    parser.add_argument('--current', help="file JSON di un'esecuzione già fatta, da confrontare senza rieseguire")
+    parser.add_argument('--compare', help="file JSON di riferimento con cui confrontare i risultati")
+    parser.add_argument('--threshold', type=float, default=0.10, help="peggioramento tollerato della mediana")
+    args = parser.parse_args(argv)
+
+    if args.current:
+        with open(args.current, encoding='utf-8') as file:
+            current = json.load(file)
+    else:
+        print(f"Benchmark con seme {args.seed}, {args.warmup} riscaldamenti e {args.repeats} ripetizioni\n")
+        current = {
+            'meta': {
+                'seed': args.seed,
+                'repeats': args.repeats,
+                'warmup': args.warmup,
+                'min_time': args.min_time,
+                'python': sys.version,
+                'implementation': platform.python_implementation(),
+                'platform': platform.platform(),
+                'processor': platform.processor(),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z')
+            },
+            'results': run_benchmark(args.structures, args.sizes, args.orders, args.operations,
+                                     args.repeats, args.warmup, args.seed, args.min_time)
+        }
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as file:
+                json.dump(current, file, indent=2)
+            print(f"\nRisultati salvati in: {args.output}")
+
+    if not args.compare:
+        return 0
+
+    with open(args.compare, encoding='utf-8') as file:
+        baseline = json.load(file)
+    rows = compare(current, baseline, args.threshold)
+    print(f"\nConfronto con {args.compare} (soglia {args.threshold:.0%}):\n")
+    for row in rows:
+        structure, size, order, operation = row['key']
+        verdict = "REGRESSIONE" if row['regression'] else "miglioramento" if row['improvement'] else ""
+        print(f"  {structure:<16} {order:<7} N = {size:<9} {operation:<12} "
+              f"{row['baseline']:>10.1f} -> {row['current']:>10.1f} ns/op ({row['change']:+.1%}) {verdict}")
+    regressions = sum(row['regression'] for row in rows)
+    print(f"\n{regressions} regressioni su {len(rows)} misure confrontate.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
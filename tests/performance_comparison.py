@@ -1,32 +1,68 @@
-import time, random, sys, os
-import numpy as np
-import matplotlib.pyplot as plt
+import time, random, sys, os, tracemalloc, threading, tempfile, gc, statistics, argparse, signal
 import csv                                                  # nuovo import per la gestione dei file CSV
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
 # Se le strutture vengono importate male, lancio di un errore più chiaro e intuitivo
 try:
-    from data_structures.hash_table_dict import HashTableDict
+    from data_structures.hash_table_dict import HashTableDict, next_prime
+    from data_structures.hashing import HASH_FUNCTIONS
+    from data_structures.open_addressing_dict import OpenAddressingDict
+    from data_structures.concurrent_hash_table_dict import ConcurrentHashTableDict
     from data_structures.abr_dict import ABRDict
+    from data_structures.avl_dict import AVLDict
+    from data_structures.btree_dict import BTreeDict
     from data_structures.linked_list_dict import LinkedListDict
+    from data_structures.cache_dict import CacheDict
+    from data_structures.node_pool import NodePool
+    from data_structures.stats import enable_stats, disable_stats
+    from data_structures.shared_hash_table import SharedHashTable
 except ImportError:
     print("Errore: Assicurati che i file delle strutture dati si trovino in una cartella 'data_structures'")
     print("Struttura attesa: Dizionari/performance_comparison.py, Dizionari/data_structures/abr_dict.py, ecc.")
     sys.exit(1)
 
 
-def run_performance_test(dict_class, keys_to_insert, keys_to_search, keys_to_delete):
-    # Per HashTableDict scelgo una dimensione che sia un numero primo
-    # e maggiore del numero di elementi per ridurre le collisioni
-    if dict_class == HashTableDict:
-        size = len(keys_to_insert) * 2 + 1                                  # dimensione circa il doppio delle chiavi
-        while not all(size % i for i in range(2, int(size ** 0.5) + 1)):    # controllo di primalità
-            size += 2                                                       # sennò passa al prossimo numero dispari
-        dict_instance = dict_class(size=size)
-    else:
-        dict_instance = dict_class()
+SEED = 12345                                                # seme dei dati casuali, per risultati riproducibili
+REPEATS = 3                                                 # ripetizioni di ogni test, di cui riporto la mediana
+SIZES = [1000, 5000, 10000]                                 # numero di elementi da testare
+SCENARIOS = ("Casuale", "Ordinato")
+CSV_FILENAME = "performance_results.csv"
+CSV_FIELDS = ['N', 'Scenario', 'Structure', 'Operation', 'Time (seconds)', 'Status']
+
+# Strutture dati da testare
+STRUCTURES = {
+    "Lista Concatenata": LinkedListDict,
+    "ABR (Albero Binario di Ricerca)": ABRDict,
+    "ABR bilanciato (AVL)": AVLDict,
+    "Tabella Hash": HashTableDict,
+    "Tabella Hash (indirizzamento aperto)": OpenAddressingDict,
+    "B+-albero": BTreeDict
+}
+
+
+def run_performance_test(dict_class, keys_to_insert, keys_to_search, keys_to_delete, repeats=REPEATS):
+    # Ripeto l'intero test su istanze nuove, con il garbage collector disattivato durante le misure,
+    # e riporto la mediana di ogni operazione (per misure statisticamente solide vedi benchmark_harness.py)
+    runs = []
+    for _ in range(repeats):
+        gc.collect()
+        gc.disable()
+        try:
+            runs.append(_run_performance_once(dict_class, keys_to_insert, keys_to_search, keys_to_delete))
+        finally:
+            gc.enable()
+
+    results = {operation: statistics.median(run[0][operation] for run in runs) for operation in runs[0][0]}
+    return results, runs[-1][1]
+
+
+def _run_performance_once(dict_class, keys_to_insert, keys_to_search, keys_to_delete):
+    # La tabella hash si ridimensiona da sola, quindi tutte le strutture partono con la configurazione di default
+    dict_instance = dict_class()
 
     results = {}
 
@@ -37,6 +73,20 @@ def run_performance_test(dict_class, keys_to_insert, keys_to_search, keys_to_del
     end_time_insert = time.perf_counter()
     results['insert'] = end_time_insert - start_time_insert
 
+    # Statistiche strutturali dopo l'inserimento (altezza e rotazioni per gli alberi)
+    stats = {}
+    if hasattr(dict_instance, 'height'):
+        stats['height'] = dict_instance.height()
+    if hasattr(dict_instance, 'rotations'):
+        stats['rotations'] = dict_instance.rotations
+
+    # Test SCANSIONE COMPLETA con gli iteratori (non ricorsivi, anche sugli alberi degeneri)
+    start_time_iterate = time.perf_counter()
+    for _ in dict_instance.items():
+        pass
+    end_time_iterate = time.perf_counter()
+    results['iterate'] = end_time_iterate - start_time_iterate
+
     # Test RICERCA (CON SUCCESSO)
     start_time_search_hit = time.perf_counter()                     # tempo per la ricerca delle chiavi esistenti
     for key in keys_to_search:
@@ -55,6 +105,12 @@ def run_performance_test(dict_class, keys_to_insert, keys_to_search, keys_to_del
     end_time_search_miss = time.perf_counter()
     results['search_miss'] = end_time_search_miss - start_time_search_miss
 
+    # Test RICERCA MULTIPLA: chiavi presenti e assenti in un'unica chiamata, senza eccezioni per i mancati
+    start_time_search_many = time.perf_counter()
+    dict_instance.search_many(list(keys_to_search) + miss_keys)
+    end_time_search_many = time.perf_counter()
+    results['search_many'] = end_time_search_many - start_time_search_many
+
     # Test CANCELLAZIONE
     start_time_delete = time.perf_counter()                         # tempo per la cancellazione delle chiavi
     for key in keys_to_delete:
@@ -62,25 +118,577 @@ def run_performance_test(dict_class, keys_to_insert, keys_to_search, keys_to_del
     end_time_delete = time.perf_counter()
     results['delete'] = end_time_delete - start_time_delete
 
+    return results, stats
+
+
+def measure_memory(dict_class, keys):
+    # Misuro con tracemalloc la memoria allocata dalla struttura durante l'inserimento delle chiavi
+    # Valori e chiavi sono creati prima della misura, così conto solo l'overhead della struttura
+    values = [f"value_{key}" for key in keys]
+    tracemalloc.start()
+    dict_instance = dict_class()
+    for key, value in zip(keys, values):
+        dict_instance.insert(key, value)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'bytes_per_entry': current / len(keys), 'peak_bytes': peak}
+
+
+def measure_churn(dict_class, keys, rounds=3, use_pool=False):
+    # Carico con molte cancellazioni e reinserimenti: dopo il caricamento iniziale, per ogni round cancello
+    # e reinserisco metà delle chiavi; misuro il tempo e, in una seconda esecuzione, il picco con tracemalloc
+    values = [f"value_{key}" for key in keys]
+    churn_keys, churn_values = keys[::2], values[::2]
+    results = {}
+    for traced in (False, True):
+        pool = NodePool(dict_class.node_class, max_size=len(keys)) if use_pool else None
+        dict_instance = dict_class(pool=pool)
+        for key, value in zip(keys, values):
+            dict_instance.insert(key, value)
+
+        if traced:
+            tracemalloc.start()
+        start_time = time.perf_counter()
+        for _ in range(rounds):
+            for key in churn_keys:
+                dict_instance.delete(key)
+            for key, value in zip(churn_keys, churn_values):
+                dict_instance.insert(key, value)
+        elapsed = time.perf_counter() - start_time
+        if traced:
+            results['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            results['time'] = elapsed
+    return results
+
+
+def measure_bulk_load(dict_class, keys):
+    # Confronto il caricamento con un ciclo di insert e con la costruzione in blocco from_items
+    items = [(key, f"value_{key}") for key in keys]
+
+    start_time = time.perf_counter()
+    dict_instance = dict_class()
+    for key, value in items:
+        dict_instance.insert(key, value)
+    insert_loop_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    dict_class.from_items(items)
+    bulk_time = time.perf_counter() - start_time
+
+    return {'insert_loop': insert_loop_time, 'bulk': bulk_time}
+
+
+def zipf_sample(population, count, exponent=1.1, seed=None):
+    # Estraggo count chiavi da population con distribuzione di Zipf: la chiave di rango r ha peso 1 / r^exponent
+    # I ranghi sono assegnati in ordine casuale, così le chiavi più richieste non sono le prime inserite
+    # Senza seed uso il generatore globale, già inizializzato con SEED da main
+    rng = random.Random(seed) if seed is not None else random
+    ranked = list(population)
+    rng.shuffle(ranked)
+    weights = [1 / rank ** exponent for rank in range(1, len(ranked) + 1)]
+    return rng.choices(ranked, weights=weights, k=count)
+
+
+def hotspot_sample(population, count, hot_fraction=0.1, hot_probability=0.9, seed=None):
+    # Estraggo count chiavi da population: una frazione hot_fraction delle chiavi riceve hot_probability degli accessi
+    rng = random.Random(seed) if seed is not None else random
+    keys = list(population)
+    rng.shuffle(keys)
+    hot_size = max(1, int(len(keys) * hot_fraction))
+    hot, cold = keys[:hot_size], keys[hot_size:] or keys
+    return [rng.choice(hot) if rng.random() < hot_probability else rng.choice(cold) for _ in range(count)]
+
+
+def generate_workload(keys, count, mix=None, distribution='uniform', seed=None):
+    # Sequenza di count operazioni (operazione, chiave) sulle chiavi date
+    # mix associa a ogni operazione ('search', 'insert', 'delete') la sua frequenza relativa (default 95/5 letture
+    # e scritture); distribution sceglie le chiavi: 'uniform', 'zipf' o 'hotspot'
+    rng = random.Random(seed) if seed is not None else random
+    mix = mix or {'search': 0.95, 'insert': 0.05}
+    if distribution == 'zipf':
+        chosen = zipf_sample(keys, count, seed=rng.random())
+    elif distribution == 'hotspot':
+        chosen = hotspot_sample(keys, count, seed=rng.random())
+    elif distribution == 'uniform':
+        chosen = [rng.choice(keys) for _ in range(count)]
+    else:
+        raise ValueError(f"Distribuzione '{distribution}' non valida.")
+    operations = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    return list(zip(operations, chosen))
+
+
+def generate_sliding_window(count, window, reads_per_insert=4, seed=None):
+    # Finestra scorrevole: a ogni passo inserisco una chiave nuova (crescente, come un timestamp o un id sequenziale),
+    # faccio scadere quella uscita dalla finestra e leggo reads_per_insert chiavi ancora presenti
+    rng = random.Random(seed) if seed is not None else random
+    operations = []
+    for key in range(count):
+        operations.append(('insert', key))
+        if key >= window:
+            operations.append(('delete', key - window))
+        oldest = max(0, key - window + 1)
+        operations.extend(('search', rng.randint(oldest, key)) for _ in range(reads_per_insert))
+    return operations
+
+
+def save_trace(path, operations):
+    # Una riga per operazione: "<operazione> <chiave>", lo stesso formato letto da load_trace
+    with open(path, 'w', encoding='utf-8') as file:
+        for operation, key in operations:
+            file.write(f"{operation} {key}\n")
+
+
+def load_trace(path):
+    # Legge una traccia registrata (per esempio in produzione): righe "<operazione> <chiave>", con operazione tra
+    # insert, search e delete; righe vuote e commenti (#) vengono ignorati, le chiavi numeriche diventano interi
+    operations = []
+    with open(path, encoding='utf-8') as file:
+        for number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            operation, _, key = line.partition(' ')
+            if operation not in ('insert', 'search', 'delete'):
+                raise ValueError(f"Operazione '{operation}' non valida alla riga {number} di '{path}'.")
+            key = key.strip()
+            operations.append((operation, int(key) if key.lstrip('-').isdigit() else key))
+    return operations
+
+
+def replay(dict_instance, operations, windows=10):
+    # Esegue le operazioni sul dizionario cronometrandole una per una; le divido in windows finestre consecutive
+    # e per ognuna riporto throughput e latenze p50/p99, così si vede se le prestazioni peggiorano nel tempo
+    # (albero che si sbilancia, liste che si allungano); ricerche e cancellazioni di chiavi assenti sono ammesse
+    clock = time.perf_counter_ns
+    insert, search, delete = dict_instance.insert, dict_instance.search, dict_instance.delete
+    latencies = []
+    for operation, key in operations:
+        start = clock()
+        try:
+            if operation == 'search':
+                search(key)
+            elif operation == 'insert':
+                insert(key, key)
+            else:
+                delete(key)
+        except KeyError:
+            pass
+        latencies.append(clock() - start)
+
+    results = []
+    for index in range(min(windows, len(latencies))):
+        window = sorted(latencies[len(latencies) * index // windows:len(latencies) * (index + 1) // windows])
+        results.append({
+            'ops_per_second': len(window) / (sum(window) / 1e9) if sum(window) else 0.0,
+            'p50_ns': window[len(window) // 2],
+            'p99_ns': window[min(len(window) - 1, int(len(window) * 0.99))]
+        })
+    return results
+
+
+def measure_workloads(dict_class, keys, count, trace_path=None):
+    # Scenari di carico misto su una struttura: il dizionario parte caricato con tutte le chiavi (fuori dalla misura),
+    # tranne nella finestra scorrevole che parte vuota; con trace_path aggiungo la riproduzione della traccia
+    scenarios = {
+        "95/5 letture, Zipf": generate_workload(keys, count, distribution='zipf'),
+        "50/50 letture, hotspot": generate_workload(keys, count, {'search': 0.5, 'insert': 0.25, 'delete': 0.25},
+                                                    distribution='hotspot'),
+        "scritture 80%, uniforme": generate_workload(keys, count, {'search': 0.2, 'insert': 0.4, 'delete': 0.4}),
+        "finestra scorrevole": generate_sliding_window(count // 6, window=len(keys) // 10)
+    }
+    if trace_path is not None:
+        scenarios[f"traccia {os.path.basename(trace_path)}"] = load_trace(trace_path)
+
+    results = {}
+    for scenario, operations in scenarios.items():
+        dict_instance = dict_class()
+        if scenario != "finestra scorrevole":
+            for key in keys:
+                dict_instance.insert(key, key)
+        results[scenario] = replay(dict_instance, operations)
+    return results
+
+
+def measure_access_policies(keys, lookups, exponent=1.1):
+    # Ricerche con distribuzione di Zipf sulla lista concatenata: confronto le politiche di auto-organizzazione
+    # con la lista statica e con la lista affiancata dall'indice hash
+    configurations = {
+        "statica": {},
+        "move-to-front": {'policy': 'move_to_front'},
+        "transpose": {'policy': 'transpose'},
+        "frequenza": {'policy': 'frequency'},
+        "con indice": {'indexed': True}
+    }
+    search_keys = zipf_sample(keys, lookups, exponent)
+
+    results = {}
+    for label, options in configurations.items():
+        dict_instance = LinkedListDict(**options)
+        for key in keys:
+            dict_instance.insert(key, f"value_{key}")
+
+        start_time = time.perf_counter()
+        for key in search_keys:
+            dict_instance.search(key)
+        results[label] = {'time': time.perf_counter() - start_time, 'moves': dict_instance.moves}
+    return results
+
+
+def measure_cache(keys, lookups, capacity_ratios=(0.01, 0.1), exponent=1.1):
+    # Cache davanti a un backend: per ogni richiesta (distribuzione di Zipf) leggo dalla cache e, se manca,
+    # inserisco il valore; misuro tasso di successo e operazioni al secondo per politica e capacità
+    requests = zipf_sample(keys, lookups, exponent)
+
+    results = {}
+    for ratio in capacity_ratios:
+        capacity = max(1, int(len(keys) * ratio))
+        for policy in ('lru', 'lfu'):
+            cache = CacheDict(capacity, policy=policy)
+            start_time = time.perf_counter()
+            for key in requests:
+                if cache.get(key) is None:
+                    cache.put(key, f"value_{key}")
+            elapsed = time.perf_counter() - start_time
+            results[(policy, capacity)] = {
+                'hit_ratio': cache.hit_ratio,
+                'ops_per_second': lookups / elapsed,
+                'evictions': cache.evictions
+            }
+    return results
+
+
+def measure_hash_functions(n):
+    # Confronto le funzioni hash di HashTableDict su distribuzioni di chiavi sfavorevoli al modulo: la tabella ha
+    # dimensione fissa (fattore di carico 1) così il passo delle chiavi può coincidere con la dimensione
+    size = next_prime(n)
+    distributions = {
+        "casuali": random.sample(range(n * 10), n),
+        "multipli di 1000": [i * 1000 for i in range(n)],
+        "passo = dimensione": [i * size for i in range(n)],
+        "stringhe": [f"user:{i}" for i in range(n)]
+    }
+
+    results = {}
+    for distribution, keys in distributions.items():
+        for name in HASH_FUNCTIONS:
+            dict_instance = HashTableDict(size=size, auto_resize=False, hash_function=name)
+            start_time = time.perf_counter()
+            for key in keys:
+                dict_instance.insert(key, key)
+            for key in keys:
+                dict_instance.search(key)
+            elapsed = time.perf_counter() - start_time
+
+            histogram = dict_instance.chain_lengths()
+            results[(distribution, name)] = {
+                'time': elapsed,
+                'max_chain': len(histogram) - 1,
+                'empty_slots': histogram[0] / size,
+                'histogram': histogram
+            }
+    return results
+
+
+def measure_ordered_queries(dict_class, keys, queries=100, window=0.01):
+    # Interrogazioni su intervalli (finestre pari a window delle chiavi) e top-k: confronto range/select
+    # con l'esportazione completa seguita dal filtro in Python
+    dict_instance = dict_class.from_items((key, f"value_{key}") for key in keys)
+    lo_key, hi_key = min(keys), max(keys)
+    span = max(1, int((hi_key - lo_key) * window))
+    bounds = [(lo, lo + span) for lo in random.sample(range(lo_key, hi_key - span + 1), queries)]
+    k = max(1, int(len(keys) * window))
+
+    start_time = time.perf_counter()
+    for lo, hi in bounds:
+        list(dict_instance.range(lo, hi))
+    range_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    for lo, hi in bounds:
+        [(key, value) for key, value in dict_instance.range() if lo <= key < hi]
+    export_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    for _ in range(queries):
+        [dict_instance.select(-i) for i in range(1, k + 1)]             # le k chiavi più grandi
+    top_k_time = time.perf_counter() - start_time
+
+    return {'range': range_time, 'export_filter': export_time, 'top_k': top_k_time}
+
+
+class GlobalLockHashTableDict:
+    # Termine di paragone per il test multi-thread: HashTableDict protetta da un unico lock globale
+    def __init__(self):
+        self._dict = HashTableDict()
+        self._lock = threading.Lock()
+
+    def insert(self, key, value):
+        with self._lock:
+            self._dict.insert(key, value)
+
+    def search(self, key):
+        with self._lock:
+            return self._dict.search(key)
+
+    def delete(self, key):
+        with self._lock:
+            self._dict.delete(key)
+
+
+def measure_thread_scaling(dict_class, n, thread_counts=(1, 2, 4, 8, 16), ops_per_thread=20000, read_ratio=0.9):
+    # Throughput (operazioni al secondo) di un dizionario condiviso tra thread che eseguono un carico misto:
+    # read_ratio di ricerche, il resto diviso tra inserimenti e cancellazioni di chiavi casuali
+    results = {}
+    for threads in thread_counts:
+        dict_instance = dict_class()
+        for key in range(n):
+            dict_instance.insert(key, f"value_{key}")
+
+        barrier = threading.Barrier(threads + 1)
+
+        def worker(seed):
+            rng = random.Random(seed)
+            ops = [(rng.random(), rng.randrange(n * 2)) for _ in range(ops_per_thread)]
+            barrier.wait()                                          # tutti i thread partono insieme
+            for draw, key in ops:
+                try:
+                    if draw < read_ratio:
+                        dict_instance.search(key)
+                    elif draw < (1 + read_ratio) / 2:
+                        dict_instance.insert(key, f"value_{key}")
+                    else:
+                        dict_instance.delete(key)
+                except KeyError:
+                    pass
+
+        workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+        for thread in workers:
+            thread.start()
+        barrier.wait()
+        start_time = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start_time
+        results[threads] = threads * ops_per_thread / elapsed
+    return results
+
+
+def measure_snapshots(dict_class, keys, rounds=20):
+    # Un lettore ripete snapshot + scansione completa mentre un thread scrittore continua a cancellare e reinserire
+    # chiavi casuali; confronto lo snapshot persistente (O(1)) con la copia completa del dizionario
+    # Entrambi gli snapshot vengono presi sotto il lock dello scrittore: la copia completa lo blocca per O(n)
+    results = {}
+    for mode in ("copia completa", "persistente"):
+        persistent = mode == "persistente"
+        dict_instance = dict_class.from_items(((key, f"value_{key}") for key in keys), persistent=persistent)
+        lock = threading.Lock()
+        stop = threading.Event()
+        updates = 0
+
+        def writer():
+            nonlocal updates
+            rng = random.Random(SEED)
+            while not stop.is_set():
+                key = rng.choice(keys)
+                with lock:
+                    dict_instance.delete(key)
+                    dict_instance.insert(key, f"value_{updates}")
+                updates += 1
+
+        thread = threading.Thread(target=writer)
+        snapshots = []
+        snapshot_time = scan_time = 0.0
+        start_time = time.perf_counter()
+        thread.start()
+        for _ in range(rounds):
+            start = time.perf_counter()
+            with lock:
+                if persistent:
+                    snapshot = dict_instance.snapshot()
+                else:
+                    snapshot = dict_class.from_items(dict_instance.items())
+            snapshot_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in snapshot.items():                              # vista coerente: nessun RuntimeError
+                pass
+            scan_time += time.perf_counter() - start
+            snapshots.append(snapshot)
+        stop.set()
+        thread.join()
+        elapsed = time.perf_counter() - start_time
+
+        sharing = dict_instance.memory_sharing(*snapshots) if persistent else None
+        results[mode] = {
+            'snapshot': snapshot_time / rounds,
+            'scan': scan_time / rounds,
+            'updates_per_second': updates / elapsed,
+            'distinct_nodes': sharing['distinct_nodes'] if persistent else len(keys) * (rounds + 1),
+            'logical_nodes': len(keys) * (rounds + 1),
+            'copies': dict_instance.copies if persistent else 0
+        }
     return results
 
 
+def _rebuild_and_search(items, lookup_keys):
+    # Lavoro di un processo che costruisce la propria copia della tabella e poi esegue le ricerche
+    dict_instance = HashTableDict.from_items(items)
+    for key in lookup_keys:
+        dict_instance.search(key)
+    return len(lookup_keys)
+
+
+def _attach_and_search(name, lookup_keys):
+    # Lavoro di un processo che si collega alla tabella in memoria condivisa ed esegue le ricerche
+    with SharedHashTable.attach(name) as table:
+        for key in lookup_keys:
+            table.search(key)
+    return len(lookup_keys)
+
+
+def measure_shared_lookups(keys, workers=4, lookups_per_worker=20000):
+    # Confronto un pool di processi in cui ognuno ricostruisce la tabella con uno in cui tutti
+    # si collegano alla stessa tabella in memoria condivisa, costruita una sola volta
+    items = [(key, f"value_{key}") for key in keys]
+    lookup_keys = [random.choice(keys) for _ in range(lookups_per_worker)]
+    results = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        executor.submit(len, []).result()                           # avvio i processi fuori dalla misura
+        start_time = time.perf_counter()
+        list(executor.map(_rebuild_and_search, [items] * workers, [lookup_keys] * workers))
+        results['rebuild'] = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        table = SharedHashTable.create(items)
+        try:
+            list(executor.map(_attach_and_search, [table.name] * workers, [lookup_keys] * workers))
+            results['shared'] = time.perf_counter() - start_time
+            results['shared_bytes'] = table.nbytes
+        finally:
+            table.close()
+            table.unlink()
+    return results
+
+
+def measure_snapshot(dict_class, keys):
+    # Confronto il ripristino da snapshot (save/load) con la ricostruzione tramite insert
+    items = [(key, f"value_{key}") for key in keys]
+    start_time = time.perf_counter()
+    dict_instance = dict_class()
+    for key, value in items:
+        dict_instance.insert(key, value)
+    rebuild_time = time.perf_counter() - start_time
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "snapshot.bin")
+        start_time = time.perf_counter()
+        dict_instance.save(path)
+        save_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        dict_class.load(path)
+        load_time = time.perf_counter() - start_time
+        file_size = os.path.getsize(path)
+
+    return {'rebuild': rebuild_time, 'save': save_time, 'load': load_time, 'file_bytes': file_size}
+
+
+def measure_operation_stats(dict_class, keys_to_insert, keys_to_search):
+    # Ripeto inserimenti e ricerche con le statistiche attive per spiegare i tempi: nodi visitati,
+    # confronti, profondità o lunghezza delle liste e allocazioni per operazione
+    dict_instance = dict_class()
+    recorder = enable_stats(dict_instance)
+    for key in keys_to_insert:
+        dict_instance.insert(key, f"value_{key}")
+    for key in keys_to_search:
+        dict_instance.search(key)
+    disable_stats(dict_instance)
+    return recorder.snapshot()
+
+
+def measure_large_ordered(dict_classes, n, lookups=100000, queries=1000):
+    # Confronto gli alberi ordinati su n chiavi casuali: caricamento con insert, ricerche, intervalli da 100 chiavi,
+    # altezza e memoria (misurata in una seconda costruzione, perché tracemalloc rallenta le allocazioni)
+    rng = random.Random(SEED)
+    keys = rng.sample(range(n * 10), n)
+    search_keys = rng.sample(keys, min(lookups, n))
+    sorted_keys = sorted(keys)
+    bounds = [(sorted_keys[i], sorted_keys[min(i + 100, n - 1)]) for i in rng.sample(range(n), min(queries, n))]
+
+    results = {}
+    for name, dict_class in dict_classes.items():
+        gc.collect()
+        dict_instance = dict_class()
+        start_time = time.perf_counter()
+        for key in keys:
+            dict_instance.insert(key, key)
+        insert_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        for key in search_keys:
+            dict_instance.search(key)
+        search_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        for lo, hi in bounds:
+            for _ in dict_instance.range(lo, hi):
+                pass
+        range_time = time.perf_counter() - start_time
+
+        height = dict_instance.height()
+        del dict_instance
+        results[name] = {
+            'insert_ops': n / insert_time,
+            'search_ops': len(search_keys) / search_time,
+            'range_queries': len(bounds) / range_time,
+            'height': height,
+            'bytes_per_entry': measure_memory(dict_class, keys)['bytes_per_entry']
+        }
+    return results
+
+
+def print_structure_stats(stats):
+    # Stampo le statistiche strutturali, se la struttura ne fornisce
+    if 'height' in stats:
+        print(f"    - Altezza dopo l'inserimento: {stats['height']}")
+    if 'rotations' in stats:
+        print(f"    - Rotazioni eseguite:        {stats['rotations']}")
+
+
+# Colori delle barre nei grafici, uno per struttura
+STRUCTURE_COLORS = {
+    "Lista Concatenata": '#e15759',
+    "ABR (Albero Binario di Ricerca)": '#edc949',
+    "ABR bilanciato (AVL)": '#59a14f',
+    "Tabella Hash": '#76b7b2',
+    "Tabella Hash (indirizzamento aperto)": '#4e79a7',
+    "B+-albero": '#b07aa1',
+}
+
+
 def plot_results(results_data, n, scenario):
     # Funzione per creare e salvare un grafico a barre con i risultati
+    # matplotlib viene importato solo qui, così le esecuzioni senza grafici non ne pagano il caricamento
+    import matplotlib
+    matplotlib.use('Agg')                                           # salvo solo su file, non serve un display
+    import matplotlib.pyplot as plt
+
     labels = ['Inserimento', 'Ricerca (con successo)', 'Ricerca (senza successo)', 'Cancellazione']
 
-    # Estraggo i dati per ogni struttura
-    list_times = [results_data['Lista Concatenata'][op] for op in ['insert', 'search_hit', 'search_miss', 'delete']]
-    abr_times = [results_data['ABR (Albero Binario di Ricerca)'][op] for op in ['insert', 'search_hit', 'search_miss', 'delete']]
-    hash_times = [results_data['Tabella Hash'][op] for op in ['insert', 'search_hit', 'search_miss', 'delete']]
+    operations = ['insert', 'search_hit', 'search_miss', 'delete']
 
-    x = np.arange(len(labels))                                      # posizioni delle etichette
-    width = 0.27                                                    # la larghezza delle barre
+    x = range(len(labels))                                          # posizioni delle etichette
+    width = 0.8 / len(results_data)                                 # la larghezza delle barre
 
     fig, ax = plt.subplots(figsize=(15, 8))
-    rects1 = ax.bar(x - width, list_times, width, label='Lista Concatenata', color='#e15759')
-    rects2 = ax.bar(x, abr_times, width, label='ABR (Albero Binario di Ricerca)', color='#edc949')
-    rects3 = ax.bar(x + width, hash_times, width, label='Tabella Hash', color='#76b7b2')
+    for i, (name, results) in enumerate(results_data.items()):      # una serie di barre per ogni struttura
+        times = [results[op] for op in operations]
+        offset = (i - (len(results_data) - 1) / 2) * width
+        rects = ax.bar([position + offset for position in x], times, width, label=name, color=STRUCTURE_COLORS.get(name))
+        ax.bar_label(rects, padding=3, fmt='%.5f')                  # etichette con i valori sopra le barre
 
     ax.set_ylabel('Tempo (secondi)')                                # aggiungo etichette, titolo e legenda
     # Uso la scala logaritmica per visualizzare meglio le grandi differenze di tempo
@@ -90,11 +698,6 @@ def plot_results(results_data, n, scenario):
     ax.set_xticklabels(labels)
     ax.legend()
 
-    # Etichette con i valori sopra le barre
-    ax.bar_label(rects1, padding=3, fmt='%.5f')
-    ax.bar_label(rects2, padding=3, fmt='%.5f')
-    ax.bar_label(rects3, padding=3, fmt='%.5f')
-
     fig.tight_layout()
 
     # Salvo il grafico in un file
@@ -104,18 +707,44 @@ def plot_results(results_data, n, scenario):
     plt.close(fig)                                                  # chiudo la figura per liberare memoria
 
 
-def main():
-    # Numero di elementi da testare
-    sizes = [1000, 5000, 10000]
+def main(trace_path=None, plot=False):
+    sizes = SIZES
+    structures = STRUCTURES
 
-    # Strutture dati da testare
-    structures = {
-        "Lista Concatenata": LinkedListDict,
+    # Strutture che offrono il caricamento in blocco (from_items / bulk_insert)
+    bulk_structures = {
         "ABR (Albero Binario di Ricerca)": ABRDict,
+        "ABR bilanciato (AVL)": AVLDict,
+        "Tabella Hash": HashTableDict,
+        "B+-albero": BTreeDict
+    }
+
+    # Strutture ordinate che offrono range, floor/ceiling e rank/select
+    ordered_structures = {
+        "ABR (Albero Binario di Ricerca)": ABRDict,
+        "ABR bilanciato (AVL)": AVLDict,
+        "B+-albero": BTreeDict
+    }
+
+    # Strutture che offrono le statistiche per operazione (data_structures.stats)
+    stats_structures = (
+        "Lista Concatenata",
+        "ABR (Albero Binario di Ricerca)",
+        "ABR bilanciato (AVL)",
+        "Tabella Hash",
+        "B+-albero"
+    )
+
+    # Strutture a nodi su cui confronto il riciclo dei nodi con NodePool
+    # (la lista concatenata è esclusa: le sue cancellazioni sono O(n) e dominerebbero il tempo del test)
+    churn_structures = {
+        "ABR (Albero Binario di Ricerca)": ABRDict,
+        "ABR bilanciato (AVL)": AVLDict,
         "Tabella Hash": HashTableDict
     }
 
     print("Inizio del confronto delle performance dei dizionari...\n")
+    random.seed(SEED)
 
     # Lista per raccogliere tutti i risultati per il salvataggio CSV
     all_results_for_csv = []
@@ -127,29 +756,23 @@ def main():
 
         # DATI CASUALI
         print("\n--- CASO 1: Dati con chiavi CASUALI ---\n")
-        random_keys = random.sample(range(n * 10), n)               # random.sample garantisce l'assenza di duplicati
-
-        # Estraggo sottoinsiemi disgiunti per ricerca e cancellazione
-        search_keys_subset = random.sample(random_keys, n // 2)
-        # Rimuovo le chiavi usate per la ricerca dal pool per la cancellazione
-        remaining_keys = list(set(random_keys) - set(search_keys_subset))
-        delete_keys_subset = random.sample(remaining_keys, n // 2)
+        random_keys, search_keys_subset, delete_keys_subset = scenario_keys(n, "Casuale")
 
-        # Dizionario per raccogliere i risultati di questo scenario per il plotting
-        results_random = {}
         for name, dict_class in structures.items():
-            results = run_performance_test(
+            results, stats = run_performance_test(
                 dict_class,
                 keys_to_insert=random_keys,
                 keys_to_search=search_keys_subset,
                 keys_to_delete=delete_keys_subset
             )
-            results_random[name] = results                          # salvo i risultati per il plotting
             print(f"  {name}:")
             print(f"    - Inserimento:               {results['insert']:.6f} secondi")
+            print(f"    - Scansione completa:        {results['iterate']:.6f} secondi")
             print(f"    - Ricerca (con successo):    {results['search_hit']:.6f} secondi")
             print(f"    - Ricerca (senza successo):  {results['search_miss']:.6f} secondi")
+            print(f"    - Ricerca multipla:          {results['search_many']:.6f} secondi")
             print(f"    - Cancellazione:             {results['delete']:.6f} secondi")
+            print_structure_stats(stats)
 
             # Aggiungo i risultati al dizionario per il CSV
             for op_name, op_time in results.items():
@@ -158,35 +781,29 @@ def main():
                     'Scenario': "Casuale",
                     'Structure': name,
                     'Operation': op_name.replace('_', ' ').title(),
-                    'Time (seconds)': op_time
+                    'Time (seconds)': op_time,
+                    'Status': 'ok'
                 })
 
-        # Chiamo la funzione per creare il grafico dello scenario casuale
-        plot_results(results_random, n, "Casuale")
-
         # DATI ORDINATI
         print("\n--- CASO 2: Dati con chiavi ORDINATE (crescenti) ---\n")
-        ordered_keys = list(range(n))  # chiavi ordinate da 0 a n-1
-
-        # Per il test di ricerca e cancellazione uso chiavi alternate
-        keys_for_search = ordered_keys[::2]                         # prendo elementi con indici pari
-        keys_for_delete = ordered_keys[1::2]                        # prendo elementi con indici dispari
+        ordered_keys, keys_for_search, keys_for_delete = scenario_keys(n, "Ordinato")
 
-        # Dizionario per raccogliere i risultati di questo scenario per il plotting
-        results_ordered = {}
         for name, dict_class in structures.items():
-            results = run_performance_test(
+            results, stats = run_performance_test(
                 dict_class,
                 keys_to_insert=ordered_keys,
                 keys_to_search=keys_for_search,
                 keys_to_delete=keys_for_delete
             )
-            results_ordered[name] = results                         # salvo i risultati per il plotting
             print(f"  {name}:")
             print(f"    - Inserimento:               {results['insert']:.6f} secondi")
+            print(f"    - Scansione completa:        {results['iterate']:.6f} secondi")
             print(f"    - Ricerca (con successo):    {results['search_hit']:.6f} secondi")
             print(f"    - Ricerca (senza successo):  {results['search_miss']:.6f} secondi")
+            print(f"    - Ricerca multipla:          {results['search_many']:.6f} secondi")
             print(f"    - Cancellazione:             {results['delete']:.6f} secondi")
+            print_structure_stats(stats)
 
             # Aggiungo i risultati al dizionario per il CSV
             for op_name, op_time in results.items():
@@ -195,28 +812,380 @@ def main():
                     'Scenario': "Ordinato",
                     'Structure': name,
                     'Operation': op_name.replace('_', ' ').title(),
-                    'Time (seconds)': op_time
+                    'Time (seconds)': op_time,
+                    'Status': 'ok'
                 })
 
-        # Chiamo la funzione per creare il grafico dello scenario ordinato
-        plot_results(results_ordered, n, "Ordinato")
+        # STATISTICHE PER OPERAZIONE
+        print("\n--- Statistiche per operazione (chiavi casuali e ordinate, ricerche con successo) ---\n")
+        for scenario, keys_to_insert, keys_to_search in (("casuali", random_keys, search_keys_subset),
+                                                          ("ordinate", ordered_keys, keys_for_search)):
+            for name, dict_class in structures.items():
+                if name not in stats_structures:
+                    continue
+                operations = measure_operation_stats(dict_class, keys_to_insert, keys_to_search)['operations']
+                search = operations['search']['metrics']
+                print(f"  {name}, chiavi {scenario}:")
+                print(f"    - Nodi visitati per ricerca: media {search['nodes_visited']['mean']:.1f}, "
+                      f"p99 {search['nodes_visited']['p99']}, massimo {search['nodes_visited']['max']}")
+                print(f"    - Confronti per ricerca:     media {search['comparisons']['mean']:.1f}")
+                print(f"    - Allocazioni per insert:    media "
+                      f"{operations['insert']['metrics']['allocations']['mean']:.2f}")
+
+        # CARICAMENTO IN BLOCCO
+        print("\n--- Caricamento: ciclo di insert contro from_items (chiavi ordinate) ---\n")
+        for name, dict_class in bulk_structures.items():
+            bulk = measure_bulk_load(dict_class, ordered_keys)
+            print(f"  {name}:")
+            print(f"    - Ciclo di insert:           {bulk['insert_loop']:.6f} secondi")
+            print(f"    - from_items:                {bulk['bulk']:.6f} secondi")
+
+        # INTERROGAZIONI ORDINATE
+        print("\n--- Interrogazioni su intervalli e top-k (100 interrogazioni, finestre dell'1%) ---\n")
+        for name, dict_class in ordered_structures.items():
+            ordered = measure_ordered_queries(dict_class, random_keys)
+            print(f"  {name}:")
+            print(f"    - range(lo, hi):             {ordered['range']:.6f} secondi")
+            print(f"    - Esportazione e filtro:     {ordered['export_filter']:.6f} secondi")
+            print(f"    - Top-k con select:          {ordered['top_k']:.6f} secondi")
+
+        # POLITICHE DI ACCESSO DELLA LISTA CONCATENATA
+        print(f"\n--- Lista concatenata: {n} ricerche con distribuzione di Zipf (s = 1.1) ---\n")
+        for label, policy in measure_access_policies(random_keys, n).items():
+            print(f"  - {label:<14} {policy['time']:.6f} secondi, {policy['moves']} spostamenti")
+
+        # FUNZIONI HASH
+        print(f"\n--- Funzioni hash della Tabella Hash: inserimento e ricerca, liste più lunghe ---\n")
+        for (distribution, name), hashing in measure_hash_functions(n).items():
+            print(f"  - {distribution:<20} {name:<10} {hashing['time']:.6f} secondi, "
+                  f"lista più lunga {hashing['max_chain']}, slot vuoti {hashing['empty_slots']:.1%}")
+
+        # CACHE LRU / LFU
+        print(f"\n--- Cache con capacità limitata: {n * 10} richieste con distribuzione di Zipf (s = 1.1) ---\n")
+        for (policy, capacity), cache in measure_cache(random_keys, n * 10).items():
+            print(f"  - {policy.upper()}, capacità {capacity:<6} successi {cache['hit_ratio']:.1%}, "
+                  f"{cache['ops_per_second']:,.0f} operazioni/secondo, {cache['evictions']} scarti")
+
+        # SNAPSHOT SU DISCO
+        print("\n--- Snapshot su disco: save/load contro ricostruzione con insert (chiavi ordinate) ---\n")
+        for name, dict_class in structures.items():
+            snapshot = measure_snapshot(dict_class, ordered_keys)
+            print(f"  {name}:")
+            print(f"    - Ricostruzione con insert:  {snapshot['rebuild']:.6f} secondi")
+            print(f"    - save:                      {snapshot['save']:.6f} secondi "
+                  f"({snapshot['file_bytes'] / 1024:.1f} KiB)")
+            print(f"    - load:                      {snapshot['load']:.6f} secondi")
+
+        # MEMORIA
+        print("\n--- Occupazione di memoria (tracemalloc, chiavi casuali) ---\n")
+        for name, dict_class in structures.items():
+            memory = measure_memory(dict_class, random_keys)
+            print(f"  {name}:")
+            print(f"    - Byte per elemento:         {memory['bytes_per_entry']:.1f}")
+            print(f"    - Picco di memoria:          {memory['peak_bytes'] / 1024:.1f} KiB")
+
+        print("\n--- Inserimenti e cancellazioni ripetuti, con e senza NodePool ---\n")
+        for name, dict_class in churn_structures.items():
+            print(f"  {name}:")
+            for use_pool in (False, True):
+                churn = measure_churn(dict_class, random_keys, use_pool=use_pool)
+                label = "con pool" if use_pool else "senza pool"
+                print(f"    - {label:<10} tempo {churn['time']:.6f} secondi, picco {churn['peak_bytes'] / 1024:.1f} KiB")
+
+    # CARICHI MISTI E TRACCE (una sola volta, con la dimensione più grande)
+    workload_keys = random.sample(range(sizes[-1] * 10), sizes[-1])
+    if trace_path is None:                                          # senza traccia registrata ne salvo e rileggo una
+        trace_path = os.path.join(tempfile.mkdtemp(), 'zipf_trace.txt')
+        save_trace(trace_path, generate_workload(workload_keys, 20000, {'search': 0.9, 'insert': 0.05, 'delete': 0.05},
+                                                 distribution='zipf'))
+    print(f"\n--- Carichi misti, N = {sizes[-1]}, 20000 operazioni: throughput e latenza p99 in 10 finestre ---\n")
+    for name, dict_class in structures.items():
+        print(f"  {name}:")
+        for scenario, windows in measure_workloads(dict_class, workload_keys, 20000, trace_path).items():
+            throughput = " ".join(f"{window['ops_per_second'] / 1000:.0f}k" for window in windows)
+            tail = " ".join(f"{window['p99_ns'] / 1000:.1f}" for window in windows)
+            print(f"    - {scenario}:")
+            print(f"        operazioni/secondo: {throughput}")
+            print(f"        p99 (µs):           {tail}")
+
+    # ALBERI ORDINATI SU UN MILIONE DI CHIAVI (una sola volta)
+    large_n = 10 ** 6
+    print(f"\n--- Alberi ordinati con N = {large_n} chiavi casuali ---\n")
+    large_structures = {
+        "ABR (Albero Binario di Ricerca)": ABRDict,
+        "B+-albero": BTreeDict,
+        "B+-albero (chiavi in array)": lambda: BTreeDict(int_keys=True)
+    }
+    for name, large in measure_large_ordered(large_structures, large_n).items():
+        print(f"  {name}:")
+        print(f"    - Inserimenti:               {large['insert_ops']:,.0f} operazioni/secondo")
+        print(f"    - Ricerche:                  {large['search_ops']:,.0f} operazioni/secondo")
+        print(f"    - range da 100 chiavi:       {large['range_queries']:,.0f} interrogazioni/secondo")
+        print(f"    - Altezza:                   {large['height']}")
+        print(f"    - Byte per elemento:         {large['bytes_per_entry']:.1f}")
+
+    # TEST MULTI-PROCESSO (una sola volta, con la dimensione più grande)
+    print(f"\n--- Pool di 4 processi, N = {sizes[-1]}: ricostruzione per processo contro memoria condivisa ---\n")
+    shared = measure_shared_lookups(list(range(sizes[-1])))
+    print(f"  - Ogni processo ricostruisce:  {shared['rebuild']:.6f} secondi")
+    print(f"  - Tabella condivisa:           {shared['shared']:.6f} secondi "
+          f"(una sola copia, {shared['shared_bytes'] / 1024:.1f} KiB)")
+
+    # TEST MULTI-THREAD (una sola volta, con la dimensione più grande)
+    gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()       # False solo sulle build free-threaded
+    print(f"\n--- Throughput multi-thread con N = {sizes[-1]}, 90% ricerche (GIL attivo: {gil_enabled}) ---\n")
+    thread_structures = {
+        "Tabella Hash con lock globale": GlobalLockHashTableDict,
+        "Tabella Hash concorrente (lock striping)": ConcurrentHashTableDict
+    }
+    for name, dict_class in thread_structures.items():
+        print(f"  {name}:")
+        for threads, throughput in measure_thread_scaling(dict_class, sizes[-1]).items():
+            print(f"    - {threads:>2} thread:                 {throughput:,.0f} operazioni/secondo")
+
+    # SNAPSHOT SOTTO AGGIORNAMENTI CONCORRENTI (una sola volta, con la dimensione più grande)
+    print(f"\n--- Snapshot + scansione con uno scrittore concorrente, N = {sizes[-1]}, 20 snapshot ---\n")
+    snapshot_structures = {
+        "ABR (Albero Binario di Ricerca)": ABRDict,
+        "ABR bilanciato (AVL)": AVLDict
+    }
+    snapshot_keys = scenario_keys(sizes[-1], "Casuale")[0]
+    for name, dict_class in snapshot_structures.items():
+        print(f"  {name}:")
+        for mode, snapshot in measure_snapshots(dict_class, snapshot_keys).items():
+            print(f"    {mode}:")
+            print(f"      - Snapshot (con il lock):  {snapshot['snapshot']:.6f} secondi")
+            print(f"      - Scansione:               {snapshot['scan']:.6f} secondi")
+            print(f"      - Aggiornamenti:           {snapshot['updates_per_second']:,.0f} al secondo")
+            print(f"      - Nodi in memoria:         {snapshot['distinct_nodes']:,} "
+                  f"su {snapshot['logical_nodes']:,} logici ({snapshot['copies']:,} copiati)")
 
     print(f"\n======================================================")
     print("Test completati.")
     print(f"======================================================")
 
     # Salvataggio di tutti i risultati numerici in un file CSV
-    csv_filename = "performance_results.csv"
-    # Definisco l'ordine delle colonne (intestazioni)
-    fieldnames = ['N', 'Scenario', 'Structure', 'Operation', 'Time (seconds)']
+    csv_filename = CSV_FILENAME
 
     with open(csv_filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDS)
         writer.writeheader()  # Scrivo l'intestazione
         writer.writerows(all_results_for_csv)                       # scrivo tutti i dati raccolti
 
     print(f"Risultati numerici salvati in: {csv_filename}")
 
+    if plot:
+        plot_csv(csv_filename)
+
+
+def scenario_keys(n, scenario):
+    # Chiavi da inserire, cercare e cancellare per uno scenario, generate dal seme: il report sequenziale e
+    # l'esecuzione parallela (in processi diversi) misurano esattamente gli stessi dati
+    if scenario == "Ordinato":
+        ordered_keys = list(range(n))                               # chiavi ordinate da 0 a n-1
+        # Per il test di ricerca e cancellazione uso chiavi alternate (indici pari e dispari)
+        return ordered_keys, ordered_keys[::2], ordered_keys[1::2]
+
+    rng = random.Random(f"{SEED}-{n}")
+    random_keys = rng.sample(range(n * 10), n)                      # random.sample garantisce l'assenza di duplicati
+    # Estraggo sottoinsiemi disgiunti per ricerca e cancellazione
+    search_keys = rng.sample(random_keys, n // 2)
+    remaining_keys = sorted(set(random_keys) - set(search_keys))
+    delete_keys = rng.sample(remaining_keys, n // 2)
+    return random_keys, search_keys, delete_keys
+
+
+class CaseTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise CaseTimeout()
+
+
+def _init_worker(cpus, next_cpu):
+    # Inizializzazione di ogni processo del pool: se richiesto lo fisso su una CPU diversa da quella degli altri
+    if cpus:
+        with next_cpu.get_lock():
+            cpu = cpus[next_cpu.value % len(cpus)]
+            next_cpu.value += 1
+        os.sched_setaffinity(0, {cpu})
+
+
+def run_case(n, scenario, name, timeout=None):
+    # Un caso indipendente (dimensione, scenario, struttura), eseguito in un processo del pool
+    # Con timeout (secondi) il caso viene interrotto da SIGALRM: restituisco lo stato 'timeout' senza risultati
+    keys_to_insert, keys_to_search, keys_to_delete = scenario_keys(n, scenario)
+    use_timer = timeout is not None and hasattr(signal, 'setitimer')
+    if use_timer:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        results, _ = run_performance_test(STRUCTURES[name], keys_to_insert, keys_to_search, keys_to_delete)
+        return 'ok', results
+    except CaseTimeout:
+        return 'timeout', {}
+    finally:
+        if use_timer:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+def migrate_csv(csv_filename):
+    # Prima di aggiungere righe a un CSV esistente mi assicuro che abbia le colonne di CSV_FIELDS: i file scritti prima
+    # della colonna 'Status' contengono solo casi completati, quindi la aggiungo con il valore 'ok'
+    with open(csv_filename, newline='', encoding='utf-8') as csvfile:
+        reader = csv.DictReader(csvfile)
+        fieldnames = reader.fieldnames or []
+        rows = list(reader)
+    if fieldnames == CSV_FIELDS:
+        return
+    if fieldnames != CSV_FIELDS[:-1]:
+        raise ValueError(f"Il file '{csv_filename}' ha colonne {fieldnames}, attese {CSV_FIELDS}: impossibile riprendere.")
+
+    with open(csv_filename, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(dict(row, Status='ok') for row in rows)
+
+
+def read_completed_cases(csv_filename):
+    # Casi già presenti nel CSV (con qualunque stato), da non rieseguire quando riprendo un'esecuzione interrotta
+    if not os.path.exists(csv_filename):
+        return set()
+    with open(csv_filename, newline='', encoding='utf-8') as csvfile:
+        return {(int(row['N']), row['Scenario'], row['Structure']) for row in csv.DictReader(csvfile)}
+
+
+def run_parallel(sizes=SIZES, scenarios=SCENARIOS, structures=tuple(STRUCTURES), workers=None, timeout=None,
+                 pin=False, isolate=False, resume=False, csv_filename=CSV_FILENAME):
+    # Esegue i casi (dimensione, scenario, struttura) in un pool di processi e aggiunge al CSV le righe di ogni caso
+    # appena termina, così un'esecuzione interrotta si può riprendere con resume
+    # Per ogni coppia (scenario, struttura) le dimensioni vengono eseguite in ordine crescente: se un caso supera
+    # il timeout, le dimensioni più grandi vengono saltate (e registrate come 'skipped')
+    # pin fissa ogni processo su una CPU diversa; isolate usa un processo nuovo per ogni caso
+    if resume and os.path.exists(csv_filename):
+        migrate_csv(csv_filename)
+    completed = read_completed_cases(csv_filename) if resume else set()
+    chains = []
+    for scenario in scenarios:
+        for name in structures:
+            chain = [n for n in sorted(sizes) if (n, scenario, name) not in completed]
+            if chain:
+                chains.append((scenario, name, chain))
+
+    cpus = sorted(os.sched_getaffinity(0)) if pin and hasattr(os, 'sched_setaffinity') else []
+    workers = workers or len(cpus) or os.cpu_count()
+    # Con isolate il pool usa un processo nuovo per ogni caso (max_tasks_per_child, che richiede spawn): il contatore
+    # delle CPU va creato nello stesso contesto del pool
+    if isolate and sys.version_info >= (3, 11):
+        context = multiprocessing.get_context('spawn')
+        pool_options = {'max_tasks_per_child': 1}
+    else:
+        context = multiprocessing.get_context()
+        pool_options = {}
+    next_cpu = context.Value('i', 0)
+
+    new_file = not (resume and os.path.exists(csv_filename))
+    output = {}                                                     # file CSV e writer, aperti alla prima riga
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(cpus, next_cpu), **pool_options) as executor:
+        def submit(chain_index):
+            scenario, name, chain = chains[chain_index]
+            future = executor.submit(run_case, chain[0], scenario, name, timeout)
+            pending[future] = chain_index
+
+        def record(n, scenario, name, status, results):
+            # Apro (e con un nuovo file tronco) il CSV solo quando c'è un risultato da scrivere: se il pool non parte,
+            # il file esistente resta intatto
+            if not output:
+                output['file'] = open(csv_filename, 'w' if new_file else 'a', newline='', encoding='utf-8')
+                output['writer'] = csv.DictWriter(output['file'], fieldnames=CSV_FIELDS)
+                if new_file:
+                    output['writer'].writeheader()
+            rows = [{'N': n, 'Scenario': scenario, 'Structure': name, 'Operation': op_name.replace('_', ' ').title(),
+                     'Time (seconds)': op_time, 'Status': status} for op_name, op_time in results.items()]
+            output['writer'].writerows(rows or [{'N': n, 'Scenario': scenario, 'Structure': name, 'Operation': '',
+                                                 'Time (seconds)': '', 'Status': status}])
+            output['file'].flush()
+            print(f"  N = {n:<7} {scenario:<9} {name:<40} {status}")
+
+        pending = {}
+        try:
+            for chain_index in range(len(chains)):
+                submit(chain_index)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chain_index = pending.pop(future)
+                    scenario, name, chain = chains[chain_index]
+                    n = chain.pop(0)
+                    status, results = future.result()
+                    record(n, scenario, name, status, results)
+                    if status == 'timeout':
+                        for larger in chain:                        # caso senza speranza: salto le dimensioni maggiori
+                            record(larger, scenario, name, 'skipped', {})
+                        chain.clear()
+                    if chain:
+                        submit(chain_index)
+        finally:
+            if output:
+                output['file'].close()
+
+
+def plot_csv(csv_filename=CSV_FILENAME):
+    # Passo separato e opzionale: crea un grafico per ogni (dimensione, scenario) a partire dal CSV
+    results_by_case = {}
+    with open(csv_filename, newline='', encoding='utf-8') as csvfile:
+        for row in csv.DictReader(csvfile):
+            if row.get('Status', 'ok') != 'ok' or not row['Time (seconds)']:     # casi interrotti o saltati
+                continue
+            case = results_by_case.setdefault((int(row['N']), row['Scenario']), {})
+            operation = row['Operation'].lower().replace(' ', '_')
+            case.setdefault(row['Structure'], {})[operation] = float(row['Time (seconds)'])
+
+    for (n, scenario), results_data in sorted(results_by_case.items()):
+        plot_results(results_data, n, scenario)
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Confronto delle performance dei dizionari")
+    commands = parser.add_subparsers(dest='command')
+
+    report = commands.add_parser('report', help="report completo sequenziale (comando di default)")
+    report.add_argument('--trace', help="traccia registrata da riprodurre nei carichi misti")
+    report.add_argument('--plot', action='store_true', help="crea anche i grafici alla fine")
+
+    run = commands.add_parser('run', help="esegue i casi base in parallelo e li aggiunge al CSV")
+    run.add_argument('--sizes', nargs='+', type=int, default=SIZES)
+    run.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    run.add_argument('--structures', nargs='+', choices=tuple(STRUCTURES), default=tuple(STRUCTURES))
+    run.add_argument('--workers', type=int, help="processi del pool (default: una per CPU)")
+    run.add_argument('--timeout', type=float, help="secondi massimi per caso; oltre salto le dimensioni maggiori")
+    run.add_argument('--pin', action='store_true', help="fissa ogni processo su una CPU diversa")
+    run.add_argument('--isolate', action='store_true', help="usa un processo nuovo per ogni caso")
+    run.add_argument('--resume', action='store_true', help="salta i casi già presenti nel CSV")
+    run.add_argument('--csv', default=CSV_FILENAME)
+    run.add_argument('--plot', action='store_true', help="crea anche i grafici alla fine")
+
+    plot = commands.add_parser('plot', help="crea i grafici dal CSV (importa matplotlib solo qui)")
+    plot.add_argument('--csv', default=CSV_FILENAME)
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] not in commands.choices and argv[0] not in ('-h', '--help'):
+        argv.insert(0, 'report')                                    # senza comando: report come in origine
+    return parser.parse_args(argv)
+
 
 if __name__ == "__main__":
-    main()
+    args = parse_arguments()
+    if args.command == 'report':
+        main(trace_path=args.trace, plot=args.plot)
+    elif args.command == 'run':
+        run_parallel(args.sizes, args.scenarios, args.structures, args.workers, args.timeout,
+                     args.pin, args.isolate, args.resume, args.csv)
+        if args.plot:
+            plot_csv(args.csv)
+    else:
+        plot_csv(args.csv)
@@ -0,0 +1,350 @@
+import gc
+import random
+
+import pytest
+
+from data_structures.abr_dict import ABRDict
+from data_structures.avl_dict import AVLDict
+from data_structures.btree_dict import BTreeDict
+from data_structures.cache_dict import LFU, LRU, CacheDict
+from data_structures.concurrent_hash_table_dict import ConcurrentHashTableDict
+from data_structures.hash_table_dict import HashTableDict
+from data_structures.hashing import keyed_hash
+from data_structures.linked_list_dict import FREQUENCY, MOVE_TO_FRONT, TRANSPOSE, LinkedListDict
+from data_structures.node_pool import NodePool
+from data_structures.open_addressing_dict import OpenAddressingDict
+from data_structures.stats import disable_stats, enable_stats
+
+# Costruttori dei dizionari con l'interfaccia completa (insert, search, delete, operazioni multiple, iteratori)
+ENGINES = {
+    'linked_list': LinkedListDict,
+    'linked_list_indexed': lambda: LinkedListDict(indexed=True),
+    'linked_list_move_to_front': lambda: LinkedListDict(policy=MOVE_TO_FRONT),
+    'linked_list_transpose': lambda: LinkedListDict(policy=TRANSPOSE),
+    'linked_list_frequency': lambda: LinkedListDict(policy=FREQUENCY, indexed=True),
+    'abr': ABRDict,
+    'abr_pool': lambda: ABRDict(pool=NodePool(ABRDict.node_class)),
+    'abr_persistent': lambda: ABRDict(persistent=True),
+    'avl': AVLDict,
+    'avl_persistent': lambda: AVLDict(persistent=True),
+    'btree': lambda: BTreeDict(order=4),
+    'btree_int_keys': lambda: BTreeDict(order=5, int_keys=True),
+    'hash_fibonacci': HashTableDict,
+    'hash_modulo': lambda: HashTableDict(hash_function='modulo'),
+    'hash_keyed': lambda: HashTableDict(hash_function='keyed'),
+    'hash_pool': lambda: HashTableDict(pool=NodePool(HashTableDict.node_class)),
+    'open_addressing': OpenAddressingDict,
+    'open_addressing_generic': lambda: OpenAddressingDict(int_keys=False),
+}
+ORDERED = ('abr', 'abr_persistent', 'avl', 'avl_persistent', 'btree', 'btree_int_keys')
+
+
+def random_operations(dict_instance, seed, steps=3000, key_range=300):
+    # Stesse operazioni su dict_instance e su un dict di riferimento, confrontando ogni risultato
+    rng = random.Random(seed)
+    reference = {}
+    for step in range(steps):
+        key = rng.randrange(-key_range // 2, key_range)
+        draw = rng.random()
+        if draw < 0.45:
+            dict_instance.insert(key, step)
+            reference[key] = step
+        elif draw < 0.65:
+            if key in reference:
+                assert dict_instance.search(key) == reference[key]
+            else:
+                with pytest.raises(KeyError):
+                    dict_instance.search(key)
+        elif draw < 0.85:
+            if key in reference:
+                dict_instance.delete(key)
+                del reference[key]
+            else:
+                with pytest.raises(KeyError):
+                    dict_instance.delete(key)
+        else:
+            keys = [rng.randrange(-key_range // 2, key_range) for _ in range(8)]
+            values, hits = dict_instance.search_many(keys, default='missing')
+            assert values == [reference.get(k, 'missing') for k in keys]
+            assert hits == [k in reference for k in keys]
+            assert dict_instance.contains_many(keys) == hits
+            if draw > 0.97:
+                removed = dict_instance.delete_many(keys)
+                assert removed == [reference.pop(k, None) is not None for k in keys]
+        assert len(dict_instance) == len(reference)
+    return reference
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_matches_dict_reference(engine):
+    dict_instance = ENGINES[engine]()
+    reference = random_operations(dict_instance, seed=engine)
+    assert sorted(dict_instance.items()) == sorted(reference.items())
+    assert sorted(dict_instance.keys()) == sorted(reference)
+    assert sorted(dict_instance.values()) == sorted(reference.values())
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_iteration_fails_fast_on_insert(engine):
+    dict_instance = ENGINES[engine]()
+    for key in range(50):
+        dict_instance.insert(key, key)
+    with pytest.raises(RuntimeError):
+        for key in dict_instance.keys():
+            dict_instance.insert(1000 + key, key)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_save_and_load(engine, tmp_path):
+    dict_instance = ENGINES[engine]()
+    reference = random_operations(dict_instance, seed=1, steps=500)
+    path = tmp_path / 'snapshot.bin'
+    dict_instance.save(path)
+    loaded = type(dict_instance).load(path)
+    assert sorted(loaded.items()) == sorted(reference.items())
+
+
+@pytest.mark.parametrize('engine', ORDERED)
+def test_ordered_queries(engine):
+    dict_instance = ENGINES[engine]()
+    reference = random_operations(dict_instance, seed=7)
+    keys = sorted(reference)
+    assert list(dict_instance.items()) == [(k, reference[k]) for k in keys]
+    assert dict_instance.min() == (keys[0], reference[keys[0]])
+    assert dict_instance.max() == (keys[-1], reference[keys[-1]])
+    for i, key in enumerate(keys):
+        assert dict_instance.rank(key) == i
+        assert dict_instance.select(i) == (key, reference[key])
+    assert dict_instance.select(-1) == (keys[-1], reference[keys[-1]])
+    with pytest.raises(IndexError):
+        dict_instance.select(len(keys))
+    for lo, hi in ((None, None), (-20, 40), (10, 10), (None, 0), (100, None)):
+        expected = [(k, reference[k]) for k in keys if (lo is None or lo <= k) and (hi is None or k < hi)]
+        assert list(dict_instance.range(lo, hi)) == expected
+    for probe in range(-160, 310, 7):
+        below = [k for k in keys if k <= probe]
+        above = [k for k in keys if k >= probe]
+        if below:
+            assert dict_instance.floor(probe) == (below[-1], reference[below[-1]])
+        else:
+            with pytest.raises(KeyError):
+                dict_instance.floor(probe)
+        if above:
+            assert dict_instance.ceiling(probe) == (above[0], reference[above[0]])
+        else:
+            with pytest.raises(KeyError):
+                dict_instance.ceiling(probe)
+
+
+@pytest.mark.parametrize('dict_class', (ABRDict, AVLDict))
+def test_snapshots_keep_their_version(dict_class):
+    rng = random.Random(3)
+    dict_instance = dict_class(persistent=True)
+    reference = {}
+    snapshots = []
+    for step in range(2000):
+        key = rng.randrange(200)
+        if rng.random() < 0.6:
+            dict_instance.insert(key, step)
+            reference[key] = step
+        elif key in reference:
+            dict_instance.delete(key)
+            del reference[key]
+        if step % 100 == 0:
+            snapshots.append((dict_instance.snapshot(), sorted(reference.items())))
+    for snapshot, expected in snapshots:
+        assert list(snapshot.items()) == expected
+        assert len(snapshot) == len(expected)
+    sharing = dict_instance.memory_sharing(*(snapshot for snapshot, _ in snapshots))
+    assert sharing['distinct_nodes'] < sharing['logical_nodes']
+
+
+@pytest.mark.parametrize('dict_class', (ABRDict, AVLDict))
+@pytest.mark.parametrize('keys', ([5], [5, 3], [5, 3, 8]))
+def test_snapshot_is_read_only(dict_class, keys):
+    # Regressione: cancellare la radice (o una foglia senza antenati da ricollegare) modificava lo snapshot
+    dict_instance = dict_class.from_items(((key, key) for key in keys), persistent=True)
+    snapshot = dict_instance.snapshot()
+    for key in keys + [99]:
+        with pytest.raises(TypeError):
+            snapshot.delete(key)
+    with pytest.raises(TypeError):
+        snapshot.insert(1, 1)
+    with pytest.raises(TypeError):
+        snapshot.bulk_insert([(1, 1)])
+    assert sorted(snapshot.keys()) == sorted(keys)
+
+
+def test_persistent_mode_rejects_pool():
+    with pytest.raises(ValueError):
+        ABRDict(pool=NodePool(ABRDict.node_class), persistent=True)
+    with pytest.raises(ValueError):
+        ABRDict().snapshot()
+
+
+@pytest.mark.parametrize('dict_class', (AVLDict, HashTableDict, LinkedListDict))
+def test_pool_of_wrong_node_class_is_rejected(dict_class):
+    with pytest.raises(ValueError):
+        dict_class(pool=NodePool(ABRDict.node_class if dict_class is not ABRDict else AVLDict.node_class))
+
+
+@pytest.mark.parametrize('hash_function', ('modulo', 'fibonacci'))
+def test_batch_of_unsigned_64_bit_keys(hash_function):
+    # Regressione: le chiavi in [2^63, 2^64) diventavano un array uint64 alterato dalla conversione a int64
+    dict_instance = HashTableDict(hash_function=hash_function)
+    dict_instance.bulk_insert([(2 ** 63 + 8, 'a'), (2 ** 63 + 9, 'b')])
+    assert dict_instance.search(2 ** 63 + 8) == 'a'
+    assert dict_instance.search(2 ** 63 + 9) == 'b'
+
+
+def test_batch_of_tuple_keys():
+    # Regressione: le tuple di interi diventavano un array a due dimensioni
+    dict_instance = HashTableDict()
+    dict_instance.bulk_insert([((1, 2), 'a'), ((3, 4), 'b')])
+    assert dict_instance.search_many([(1, 2), (3, 4), (5, 6)]) == (['a', 'b', None], [True, True, False])
+    assert dict_instance.contains_many([(1, 2), (9, 9)]) == [True, False]
+
+
+def test_open_addressing_rejects_out_of_range_keys_without_phantoms():
+    # Regressione: la chiave 2^63 lasciava uno slot occupato senza chiave
+    dict_instance = OpenAddressingDict()
+    for key in (2 ** 63, -2 ** 63 - 1):
+        with pytest.raises(OverflowError):
+            dict_instance.insert(key, 'x')
+    assert list(dict_instance.items()) == []
+    assert len(dict_instance) == 0
+    with pytest.raises(TypeError):
+        dict_instance.insert('a', 1)
+
+
+def test_open_addressing_generic_keys():
+    dict_instance = OpenAddressingDict(int_keys=False)
+    for key in ('a', (1, 2), None, 2.5, 2 ** 70):
+        dict_instance.insert(key, repr(key))
+    dict_instance.insert(1, 'int')
+    dict_instance.insert(1.0, 'float')                          # 1.0 == 1: stessa chiave
+    assert dict_instance.search(1) == 'float'
+    assert dict_instance.search((1, 2)) == '(1, 2)'
+    assert len(dict_instance) == 6
+
+
+def test_value_updates_during_rehash_do_not_break_iteration():
+    # Regressione: gli aggiornamenti durante un rehash migravano nodi sotto l'iteratore (chiavi ripetute)
+    dict_instance = HashTableDict()
+    for key in range(12):
+        dict_instance.insert(key, key)
+    assert dict_instance.is_rehashing()
+    seen = []
+    for key in dict_instance.keys():
+        dict_instance.insert(0, 'updated')
+        dict_instance.search(key)
+        seen.append(key)
+    assert sorted(seen) == list(range(12))
+
+
+def test_searches_finish_an_interrupted_rehash():
+    dict_instance = HashTableDict()
+    key = 0
+    while not dict_instance.is_rehashing():
+        dict_instance.insert(key, key)
+        key += 1
+    for probe in range(10 * dict_instance.size):
+        with pytest.raises(KeyError):
+            dict_instance.search(-1 - probe)
+    assert not dict_instance.is_rehashing()
+
+
+def test_frequency_policy_keeps_list_sorted_on_insert():
+    # Regressione: i nuovi nodi (0 accessi) finivano in testa, davanti ai nodi già acceduti
+    dict_instance = LinkedListDict(policy=FREQUENCY)
+    dict_instance.insert('a', 1)
+    dict_instance.insert('b', 2)
+    for _ in range(3):
+        dict_instance.search('a')
+    dict_instance.insert('c', 3)
+    dict_instance.search('b')
+    assert list(dict_instance.keys()) == ['a', 'b', 'c']
+    dict_instance.delete('b')                                       # cancello l'ultimo nodo acceduto
+    dict_instance.insert('d', 4)
+    dict_instance.search('c')
+    assert list(dict_instance.keys()) == ['a', 'c', 'd']
+
+
+def test_keyed_hash_has_no_integer_collisions():
+    # Regressione: hash() riduce gli interi modulo 2^61 - 1, quindi queste chiavi collidevano tutte
+    modulus = 2 ** 61 - 1
+    keys = [5 + i * modulus for i in range(2000)]
+    assert len({keyed_hash(key) for key in keys}) == len(keys)
+    dict_instance = HashTableDict(hash_function='keyed')
+    for key in keys:
+        dict_instance.insert(key, key)
+    assert len(dict_instance.chain_lengths()) < 20                 # nessuna lista lunga quanto l'intera tabella
+    assert keyed_hash(1) == keyed_hash(1.0) == keyed_hash(True)
+
+
+def test_hash_table_save_rejects_unsupported_keys_before_writing(tmp_path):
+    dict_instance = HashTableDict()
+    dict_instance.insert(1, 'a')
+    dict_instance.insert(frozenset({1}), 'b')
+    path = tmp_path / 'table.bin'
+    with pytest.raises(TypeError):
+        dict_instance.save(path)
+    assert not path.exists()
+
+
+def test_concurrent_table_spreads_strided_keys():
+    dict_instance = ConcurrentHashTableDict(concurrency=16)
+    for i in range(16000):
+        dict_instance.insert(i * 1000, i)
+    counts = [segment.count for segment in dict_instance._segments]
+    assert min(counts) > 500
+    for i in range(0, 16000, 2):
+        dict_instance.delete(i * 1000)
+    assert sorted(dict_instance.keys()) == [i * 1000 for i in range(1, 16000, 2)]
+    dict_instance.insert('key', 'value')
+    assert dict_instance.search('key') == 'value'
+
+
+@pytest.mark.parametrize('policy', (LRU, LFU))
+def test_cache_matches_reference(policy):
+    rng = random.Random(policy)
+    cache = CacheDict(8, policy=policy)
+    for step in range(3000):
+        key = rng.randrange(20)
+        if rng.random() < 0.5:
+            cache.put(key, step)
+        else:
+            value = cache.get(key)
+            assert value is None or isinstance(value, int)
+        assert len(cache) <= 8
+    assert cache.hits + cache.misses > 0
+
+
+def test_cache_evicts_least_recently_used():
+    evicted = []
+    cache = CacheDict(2, on_evict=lambda key, value, reason: evicted.append((key, reason)))
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert evicted == [('b', 'capacity')]
+    assert cache.get('b') is None and cache.get('a') == 1
+
+
+def test_stats_of_dropped_dicts_are_released():
+    # Regressione: ogni enable_stats aggiungeva una callback a gc.callbacks, che tratteneva il recorder per sempre
+    kept = HashTableDict()
+    recorder = enable_stats(kept)
+    callbacks = len(gc.callbacks)
+    for key in range(20):
+        dropped = HashTableDict()
+        enable_stats(dropped).record('insert', {'latency_ns': 1})
+    del dropped
+    gc.collect()
+    assert len(gc.callbacks) == callbacks
+    collections = recorder.gc_collections
+    gc.collect()
+    assert recorder.gc_collections == collections + 1
+    assert disable_stats(kept) is recorder
+    gc.collect()
+    assert recorder.gc_collections == collections + 1